@@ -0,0 +1,56 @@
+"""
+Бенчмарк одновременных вызовов Stripe через courses.stripe_gateway.
+
+Запускает локальный имитатор Stripe с заданной задержкой и измеряет пропускную
+способность асинхронного создания PaymentIntent в одном процессе.
+
+Использование:
+python -m benchmarks.bench_checkout [--concurrency 300] [--latency 0.2]
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+
+import django
+
+
+async def run(concurrency, stripe_gateway):
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        stripe_gateway.acreate_payment_intent(1000, 'usd', str(uuid.uuid4()))
+        for _ in range(concurrency)
+    ], return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    failures = [result for result in results if isinstance(result, Exception)]
+    return elapsed, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--concurrency', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--workers', type=int, default=300)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myproject.settings')
+    django.setup()
+    from django.conf import settings
+    from benchmarks.fake_stripe import FakeStripeServer
+    from courses import stripe_gateway
+
+    with FakeStripeServer(latency=args.latency) as server:
+        settings.STRIPE_API_BASE = server.url
+        settings.STRIPE_MAX_WORKERS = args.workers
+        stripe_gateway.configure()
+        elapsed, failures = asyncio.run(run(args.concurrency, stripe_gateway))
+
+    print(f'checkouts: {args.concurrency}, latency: {args.latency * 1000:.0f} ms, workers: {args.workers}')
+    print(f'elapsed: {elapsed:.2f} s, throughput: {args.concurrency / elapsed:.1f} checkouts/s, '
+          f'failures: {len(failures)}')
+    print(f'sequential estimate: {args.concurrency * args.latency:.1f} s')
+
+
+if __name__ == '__main__':
+    main()
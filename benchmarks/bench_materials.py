@@ -0,0 +1,74 @@
+"""
+Микробенчмарк проверки материалов уроков.
+
+Сравнивает прежнюю построчную проверку (re.match на каждую строку) с
+myproject.utils.find_invalid_links на материалах размером в несколько мегабайт.
+
+Использование:
+python -m benchmarks.bench_materials [--megabytes 8] [--repeat 5]
+"""
+import argparse
+import random
+import re
+import time
+
+from myproject.utils import find_invalid_links, is_youtube_link
+
+
+def legacy_check(materials):
+    """Прежняя проверка из Lesson.save: регулярное выражение на каждую строку."""
+    invalid = []
+    for number, link in enumerate(materials.split('\n'), start=1):
+        if re.match(r'^https:\/\/www\.youtube\.com\/', link) is None:
+            invalid.append((number, link))
+    return invalid
+
+
+def make_materials(megabytes, seed=0, unique_links=2000, invalid_ratio=0.001):
+    """Генерирует материалы заданного размера с повторяющимися ссылками и долей ошибок."""
+    rng = random.Random(seed)
+    hosts = ['https://www.youtube.com/watch?v=', 'https://youtu.be/', 'https://m.youtube.com/watch?v=']
+    pool = [f'{rng.choice(hosts)}{rng.getrandbits(48):012x}' for _ in range(unique_links)]
+    lines = []
+    size = 0
+    target = megabytes * 1024 * 1024
+    while size < target:
+        if rng.random() < invalid_ratio:
+            line = f'https://example.com/{rng.getrandbits(32):08x}'
+        else:
+            line = rng.choice(pool)
+        lines.append(line)
+        size += len(line) + 1
+    return '\n'.join(lines) + '\n'
+
+
+def measure(func, materials, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(materials)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--megabytes', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    materials = make_materials(args.megabytes)
+    size_mb = len(materials) / (1024 * 1024)
+    lines = materials.count('\n')
+    is_youtube_link.cache_clear()
+
+    for name, func in (('legacy', legacy_check), ('find_invalid_links', find_invalid_links)):
+        seconds = measure(func, materials, args.repeat)
+        print(f'{name:>20}: {seconds * 1000:8.1f} ms  {size_mb / seconds:8.1f} MB/s  '
+              f'{lines / seconds / 1e6:6.2f} M lines/s')
+    print(f'{"invalid links":>20}: {len(find_invalid_links(materials))}')
+    print(f'{"link cache":>20}: {is_youtube_link.cache_info()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Бенчмарк стоимости сериализации строки списка уроков.
+
+Сравнивает путь ModelSerializer + JSONRenderer (экземпляры моделей) с быстрым путем
+ValuesRepresentation + ORJSONRenderer (строки values()) на данных в памяти, без базы,
+и проверяет, что оба пути дают одинаковые байты.
+
+Использование:
+python -m benchmarks.bench_serialization [--rows 10000] [--repeat 5]
+"""
+import argparse
+import datetime
+import os
+import time
+
+import django
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myproject.settings')
+    django.setup()
+    from django.contrib.auth import get_user_model
+    from rest_framework.renderers import JSONRenderer
+    from courses.models import Lesson
+    from courses.serializers import LessonSerializer
+    from myproject.renderers import ORJSONRenderer
+    from myproject.serialization import ValuesRepresentation
+
+    owner = get_user_model()(pk=1, username='owner')
+    updated_at = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+    materials = '\n'.join(f'https://www.youtube.com/watch?v={i:011d}' for i in range(3))
+    lessons = [
+        Lesson(pk=pk, title=f'Урок {pk}', description=f'Описание урока {pk}', video_links=materials[:43],
+               materials=materials, owner=owner, course_id=pk // 10 + 1, position=pk % 10 + 1,
+               updated_at=updated_at, preview_image='')
+        for pk in range(1, args.rows + 1)
+    ]
+    fast = ValuesRepresentation(LessonSerializer())
+    # Строки в том виде, в каком их вернул бы values()
+    from_instance = {
+        'owner__username': lambda lesson: lesson.owner.username,
+        'preview_image': lambda lesson: lesson.preview_image.name,
+    }
+    rows = [
+        {column: from_instance[column](lesson) if column in from_instance else getattr(lesson, column)
+         for column in fast.columns}
+        for lesson in lessons
+    ]
+
+    slow_time, slow = best_of(args.repeat, lambda: JSONRenderer().render(LessonSerializer(lessons, many=True).data))
+    fast_time, fast_bytes = best_of(args.repeat, lambda: ORJSONRenderer().render(fast.represent(rows)))
+
+    print(f'rows: {args.rows}, identical output: {slow == fast_bytes}')
+    print(f'ModelSerializer + JSONRenderer: {slow_time / args.rows * 1e6:.2f} us/row')
+    print(f'values() + ORJSONRenderer:      {fast_time / args.rows * 1e6:.2f} us/row')
+    print(f'speedup: {slow_time / fast_time:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
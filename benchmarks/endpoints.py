@@ -0,0 +1,151 @@
+"""
+Наполнение базы синтетическими данными и замеры эндпоинтов API.
+
+Объемы данных задаются переменными окружения BENCH_* (см. volumes_from_env),
+результаты замеров — задержки (p50/p90/p99) и количество SQL-запросов.
+"""
+import datetime
+import json
+import os
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+DEFAULT_VOLUMES = {
+    'courses': 20,
+    'lessons_per_course': 5,
+    'profiles': 30,
+    'subscriptions': 60,
+    'payments': 300,
+}
+
+YOUTUBE_LINK = 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'
+
+
+def volumes_from_env():
+    """Возвращает объемы данных с учетом переменных окружения BENCH_COURSES, BENCH_PAYMENTS и т.д."""
+    return {name: int(os.getenv(f'BENCH_{name.upper()}', default)) for name, default in DEFAULT_VOLUMES.items()}
+
+
+def seed(volumes, seed_value=0):
+    """
+    Создает синтетические данные пачками через bulk_create.
+
+    Args:
+        volumes (dict): Количество объектов каждого типа (см. DEFAULT_VOLUMES).
+        seed_value (int): Зерно генератора случайных чисел.
+
+    Returns:
+        User: Администратор, от имени которого выполняются запросы.
+
+    """
+    from courses.models import Course, Lesson, Payment, Subscription
+    from users_app.models import UserProfile
+
+    rng = random.Random(seed_value)
+    User = get_user_model()
+    admin = User.objects.create_superuser(username='bench-admin', email='bench-admin@example.com',
+                                          password='bench')
+    users = User.objects.bulk_create([
+        User(username=f'bench-user-{i}', email=f'bench-user-{i}@example.com')
+        for i in range(volumes['profiles'])
+    ])
+    if not users or users[0].pk is None:
+        users = list(User.objects.filter(username__startswith='bench-user-').order_by('pk'))
+    profiles = UserProfile.objects.bulk_create([
+        UserProfile(user=user, email=user.email, country='RU') for user in users
+    ])
+    if profiles and profiles[0].pk is None:
+        profiles = list(UserProfile.objects.order_by('pk'))
+
+    courses = Course.objects.bulk_create([
+        Course(title=f'Курс {i}', description='Описание курса', owner=admin)
+        for i in range(volumes['courses'])
+    ])
+    if courses and courses[0].pk is None:
+        courses = list(Course.objects.order_by('pk'))
+    Lesson.objects.bulk_create([
+        Lesson(title=f'Урок {i}', description='Описание урока', video_links=YOUTUBE_LINK,
+               materials=YOUTUBE_LINK, owner=admin, course=course)
+        for course in courses for i in range(volumes['lessons_per_course'])
+    ])
+
+    pairs = {(rng.choice(profiles).pk, rng.choice(courses).pk)
+             for _ in range(volumes['subscriptions'])} if profiles and courses else set()
+    Subscription.objects.bulk_create([Subscription(user_id=user_id, course_id=course_id)
+                                      for user_id, course_id in pairs])
+
+    course_type = ContentType.objects.get_for_model(Course)
+    now = timezone.now()
+    payments = [
+        Payment(user=admin, date_paid=now - datetime.timedelta(minutes=i), content_type=course_type,
+                object_id=rng.choice(courses).pk, amount=Decimal(rng.randint(100, 10000)) / 100,
+                payment_method=rng.choice(['cash', 'bank_transfer', 'stripe']))
+        for i in range(volumes['payments'])
+    ] if courses else []
+    Payment.objects.resolve_paid_items(payments)
+    Payment.objects.bulk_create(payments, batch_size=1000)
+    return admin
+
+
+def percentile(samples, fraction):
+    """Возвращает перцентиль выборки (ближайший ранг)."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def measure(client, url, iterations):
+    """
+    Выполняет GET-запрос несколько раз и собирает задержки и количество SQL-запросов.
+
+    Перед каждым запросом кеш очищается, чтобы измерять полный путь обработки.
+
+    Args:
+        client (APIClient): Аутентифицированный клиент.
+        url (str): Адрес эндпоинта.
+        iterations (int): Количество повторов.
+
+    Returns:
+        dict: status, queries, p50_ms, p90_ms, p99_ms, mean_ms.
+
+    """
+    latencies = []
+    queries = 0
+    status = None
+    for _ in range(iterations):
+        cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.get(url)
+            latencies.append((time.perf_counter() - started) * 1000)
+        status = response.status_code
+        queries = max(queries, len(captured.captured_queries))
+    return {
+        'status': status,
+        'queries': queries,
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p90_ms': round(percentile(latencies, 0.90), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+    }
+
+
+def write_results(path, volumes, results):
+    """Записывает результаты замеров в JSON для сравнения между запусками."""
+    payload = {
+        'timestamp': timezone.now().isoformat(),
+        'database': connection.vendor,
+        'volumes': volumes,
+        'endpoints': results,
+    }
+    with open(path, 'w', encoding='utf-8') as output:
+        json.dump(payload, output, ensure_ascii=False, indent=2)
@@ -0,0 +1,110 @@
+"""
+Локальный имитатор Stripe API для тестов и бенчмарков.
+
+Поддерживает создание PaymentIntent (POST /v1/payment_intents) с ключами
+идемпотентности и настраиваемой задержкой ответа.
+
+Использование:
+    with FakeStripeServer(latency=0.2) as server:
+        settings.STRIPE_API_BASE = server.url
+"""
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0)).decode()
+        if self.path.rstrip('/') != '/v1/payment_intents':
+            self._send(404, {'error': {'type': 'invalid_request_error', 'message': 'Unknown path'}})
+            return
+        time.sleep(server.latency)
+
+        key = self.headers.get('Idempotency-Key')
+        with server.lock:
+            server.requests += 1
+            if key and key in server.idempotent:
+                self._send(200, server.idempotent[key])
+                return
+            number = next(server.counter)
+        params = {name: values[-1] for name, values in parse_qs(body).items()}
+        intent_id = f'pi_fake_{number:08d}'
+        intent = {
+            'id': intent_id,
+            'object': 'payment_intent',
+            'amount': int(params.get('amount', 0)),
+            'currency': params.get('currency', 'usd'),
+            'client_secret': f'{intent_id}_secret_fake',
+            'created': int(time.time()),
+            'status': 'requires_payment_method',
+            'metadata': {
+                name[len('metadata['):-1]: value for name, value in params.items() if name.startswith('metadata[')
+            },
+        }
+        if key:
+            with server.lock:
+                server.idempotent[key] = intent
+        self._send(200, intent)
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Request-Id', 'req_fake')
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeStripeServer:
+    """
+    Имитатор Stripe API в фоновом потоке.
+
+    Attributes:
+        url (str): Базовый адрес для STRIPE_API_BASE.
+        requests (int): Количество обработанных запросов.
+
+    """
+
+    def __init__(self, latency=0.0, host='127.0.0.1', port=0):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency
+        self.httpd.lock = threading.Lock()
+        self.httpd.counter = itertools.count(1)
+        self.httpd.idempotent = {}
+        self.httpd.requests = 0
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,72 @@
+"""
+Бенчмарк эндпоинтов API с бюджетами SQL-запросов.
+
+Запуск (в обычном прогоне тестов бенчмарк пропускается):
+    BENCH=1 BENCH_COURSES=1000 BENCH_PAYMENTS=100000 python manage.py test benchmarks
+
+Бюджет запросов не зависит от объема данных, поэтому N+1 проваливает тест при
+любом объеме. Бюджет задержки p90 (мс) задается BENCH_LATENCY_BUDGET_MS.
+Если задан BENCH_OUTPUT, результаты пишутся в этот JSON-файл.
+"""
+import os
+import unittest
+
+from django.test import TestCase, tag
+from rest_framework.test import APIClient
+
+from .endpoints import measure, seed, volumes_from_env, write_results
+
+# Эндпоинт: (адрес, бюджет SQL-запросов или None, если бюджет пока не соблюдается)
+ENDPOINTS = {
+    'course-list': ('/courses/', 2),
+    'course-detail': ('/courses/{course}/', 2),
+    'lesson-list': ('/lessons/', 2),
+    'lesson-detail': ('/lessons/{lesson}/', 2),
+    'course-lessons': ('/courses/{course}/lessons/', 2),
+    'payment-list': ('/payments/', 1),
+    'payment-list-filtered': ('/payments/?course={course}&ordering=date_paid', 1),
+    'revenue-summary': ('/revenue/?group_by=day', 1),
+    'userprofile-list': ('/users/userprofiles/', 2),
+    'userprofile-list-view': ('/users/userprofiles-list/', 2),
+}
+
+
+@tag('benchmark')
+@unittest.skipUnless(os.getenv('BENCH'), 'бенчмарк запускается с переменной окружения BENCH=1')
+class EndpointBenchmark(TestCase):
+    """Замеры задержек и количества SQL-запросов эндпоинтов на синтетических данных."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.volumes = volumes_from_env()
+        cls.admin = seed(cls.volumes)
+
+    def test_endpoints_within_budget(self):
+        from courses.models import Course, Lesson
+
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        iterations = int(os.getenv('BENCH_ITERATIONS', '10'))
+        latency_budget = float(os.getenv('BENCH_LATENCY_BUDGET_MS', '0')) or None
+        ids = {
+            'course': Course.objects.values_list('pk', flat=True).first(),
+            'lesson': Lesson.objects.values_list('pk', flat=True).first(),
+        }
+
+        results = {}
+        for name, (url, budget) in ENDPOINTS.items():
+            result = measure(client, url.format(**ids), iterations)
+            result['query_budget'] = budget
+            results[name] = result
+
+        output = os.getenv('BENCH_OUTPUT')
+        if output:
+            write_results(output, self.volumes, results)
+
+        for name, result in results.items():
+            with self.subTest(endpoint=name):
+                self.assertEqual(result['status'], 200)
+                if result['query_budget'] is not None:
+                    self.assertLessEqual(result['queries'], result['query_budget'])
+                if latency_budget is not None:
+                    self.assertLessEqual(result['p90_ms'], latency_budget)
@@ -0,0 +1,161 @@
+import hashlib
+from functools import partial, wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+_STATS_KEYS = {'hit': 'response-cache:stats:hits', 'miss': 'response-cache:stats:misses'}
+
+
+def get_cache():
+    """Возвращает бэкенд кеша ответов (алиас из настройки RESPONSE_CACHE_ALIAS)."""
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def _version_key(model_label, scope):
+    return f'response-cache:version:{model_label}:{scope}'
+
+
+def get_version(model_label, scope='list'):
+    """
+    Возвращает текущую версию модели.
+
+    Версии хранятся в нескольких областях: ``list`` меняется при любом изменении модели,
+    ``bulk`` — только при массовых операциях, а ``<pk>`` — при изменении конкретного объекта.
+
+    Args:
+        model_label (str): Метка модели, например ``courses.course``.
+        scope (str | int): Область версии: ``list``, ``bulk`` или первичный ключ объекта.
+
+    Returns:
+        int: Номер версии.
+
+    """
+    cache = get_cache()
+    key = _version_key(model_label, scope)
+    version = cache.get(key)
+    if version is None:
+        # add() не перезапишет версию, установленную параллельным запросом
+        cache.add(key, 1, timeout=None)
+        version = cache.get(key, 1)
+    return version
+
+
+def bump_version(model_label, pk=None, using=None):
+    """
+    Увеличивает версии модели, делая устаревшими закешированные ответы.
+
+    Версия увеличивается после фиксации текущей транзакции: иначе параллельный запрос
+    мог бы прочитать еще не зафиксированные данные по старому снимку и сохранить их
+    под новой версией. Вне транзакции версия увеличивается сразу.
+
+    Старые записи не удаляются и не ищутся по шаблону: их ключи больше не запрашиваются
+    и вытесняются по TTL.
+
+    Args:
+        model_label (str): Метка модели.
+        pk (int | None): Первичный ключ измененного объекта. None — массовая операция,
+            затрагивающая произвольные объекты модели.
+        using (str | None): Алиас базы данных, фиксации транзакции которой нужно дождаться.
+
+    """
+    transaction.on_commit(partial(_bump_version, model_label, pk), using=using)
+
+
+def _bump_version(model_label, pk):
+    cache = get_cache()
+    for scope in ('list', 'bulk' if pk is None else pk):
+        key = _version_key(model_label, scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Ключа еще нет — начинаем с версии 2, чтобы не совпасть с версией по умолчанию
+            cache.set(key, 2, timeout=None)
+
+
+def get_cache_stats():
+    """
+    Возвращает счетчики попаданий и промахов кеша ответов.
+
+    Returns:
+        dict: ``{'hits': int, 'misses': int}``.
+
+    """
+    values = get_cache().get_many(list(_STATS_KEYS.values()))
+    return {
+        'hits': values.get(_STATS_KEYS['hit'], 0),
+        'misses': values.get(_STATS_KEYS['miss'], 0),
+    }
+
+
+def _record(outcome):
+    cache = get_cache()
+    key = _STATS_KEYS[outcome]
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def _response_key(view_name, request, versions):
+    params = sorted(request.query_params.lists())
+    accept = request.META.get('HTTP_ACCEPT', '')
+    digest = hashlib.md5(repr((params, accept)).encode()).hexdigest()
+    version_part = '.'.join(str(version) for version in versions)
+    return f'response-cache:{view_name}:{version_part}:{digest}'
+
+
+def cache_response(model_label, detail=False, timeout=None):
+    """
+    Декоратор действий ViewSet, кеширующий данные ответа по версии модели.
+
+    Ключ строится из имени эндпоинта, параметров запроса и версии модели: для списков —
+    версии ``list``, для detail-действий — версий ``bulk`` и самого объекта (ключ ``pk``
+    из URL). Любое сохранение или удаление увеличивает версию, поэтому устаревшие записи
+    не используются.
+
+    Args:
+        model_label (str): Метка модели, от которой зависит ответ.
+        detail (bool): True для действий над одним объектом.
+        timeout (int | None): Время жизни записи в секундах.
+
+    Returns:
+        Callable: Декорированное действие.
+
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(view, request, *args, **kwargs):
+            view_name = f'{view.basename}-{func.__name__}'
+            if detail:
+                pk = kwargs.get('pk')
+                view_name = f'{view_name}:{pk}'
+                versions = [get_version(model_label, 'bulk'), get_version(model_label, pk)]
+            else:
+                versions = [get_version(model_label)]
+            key = _response_key(view_name, request, versions)
+
+            cache = get_cache()
+            cached = cache.get(key)
+            if cached is not None:
+                _record('hit')
+                data, status_code = cached
+                response = Response(data, status=status_code)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            _record('miss')
+            response = func(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                if timeout is None:
+                    cache.set(key, (response.data, response.status_code),
+                              getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300))
+                else:
+                    cache.set(key, (response.data, response.status_code), timeout)
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
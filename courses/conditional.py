@@ -0,0 +1,73 @@
+import hashlib
+from functools import wraps
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def _make_etag(*parts):
+    return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def _list_state(model):
+    # Одна агрегирующая выборка без сериализации: время последнего изменения, количество и max(id)
+    return model._default_manager.order_by().aggregate(
+        last_modified=Max('updated_at'), total=Count('pk'), max_pk=Max('pk'),
+    )
+
+
+def conditional_response(model, detail=False):
+    """
+    Декоратор действий ViewSet с поддержкой условных GET-запросов.
+
+    ETag и Last-Modified вычисляются по полю ``updated_at`` одним легким запросом к базе,
+    без сериализации тела. Если клиент прислал совпадающий If-None-Match или
+    If-Modified-Since, возвращается ответ 304 без выполнения действия.
+
+    Списки отдаются только с ETag: удаление записи не меняет максимальное ``updated_at``,
+    поэтому по Last-Modified клиент продолжал бы получать 304 для устаревшего списка.
+    ETag списка учитывает также количество записей и максимальный id.
+
+    Args:
+        model (type): Модель с полем ``updated_at``.
+        detail (bool): True для действий над одним объектом (ключ ``pk`` из URL).
+
+    Returns:
+        Callable: Декорированное действие.
+
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(view, request, *args, **kwargs):
+            params = sorted(request.query_params.lists())
+            accept = request.META.get('HTTP_ACCEPT', '')
+            if detail:
+                pk = kwargs.get('pk')
+                last_modified = (
+                    model._default_manager.filter(pk=pk).values_list('updated_at', flat=True).first()
+                )
+                if last_modified is None:
+                    # Объект не найден — ответ (404) формирует само действие
+                    return func(view, request, *args, **kwargs)
+                etag = _make_etag(model._meta.label_lower, pk, last_modified.isoformat(), params, accept)
+            else:
+                state = _list_state(model)
+                etag = _make_etag(model._meta.label_lower,
+                                  state['last_modified'] and state['last_modified'].isoformat(),
+                                  state['total'], state['max_pk'], params, accept)
+                last_modified = None
+
+            timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+            not_modified = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if not_modified is not None:
+                return not_modified
+
+            response = func(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                response['ETag'] = etag
+                if timestamp is not None:
+                    response['Last-Modified'] = http_date(timestamp)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.5 on 2026-10-18 10:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_course_lesson_count_lesson_course'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['date_paid', 'id'], name='payment_date_paid_id_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.5 on 2026-10-18 11:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users_app', '0003_userprofile_email_userprofile_first_name'),
+        ('courses', '0007_course_updated_at_lesson_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='subscription',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users_app.userprofile'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.5 on 2026-10-18 11:30
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+import django.db.models.deletion
+
+
+def backfill_paid_items(apps, schema_editor):
+    """Заполняет course/lesson у существующих платежей set-based запросами."""
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    Course = apps.get_model('courses', 'Course')
+    Lesson = apps.get_model('courses', 'Lesson')
+    Payment = apps.get_model('courses', 'Payment')
+
+    course_type = ContentType.objects.filter(app_label='courses', model='course').first()
+    lesson_type = ContentType.objects.filter(app_label='courses', model='lesson').first()
+    if course_type is not None:
+        Payment.objects.filter(
+            content_type=course_type, object_id__in=Course.objects.values('pk'),
+        ).update(course_id=F('object_id'))
+    if lesson_type is not None:
+        Payment.objects.filter(
+            content_type=lesson_type, object_id__in=Lesson.objects.values('pk'),
+        ).update(
+            lesson_id=F('object_id'),
+            course_id=Subquery(Lesson.objects.filter(pk=OuterRef('object_id')).values('course_id')[:1]),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('courses', '0008_alter_subscription_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='course',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payments', to='courses.course', verbose_name='Курс'),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='lesson',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payments', to='courses.lesson', verbose_name='Урок'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['content_type', 'object_id'], name='payment_paid_item_idx'),
+        ),
+        migrations.RunPython(backfill_paid_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.5 on 2026-10-18 14:00
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Индексируемые поля и их веса в ранжировании (A — самый высокий)
+SEARCH_FIELDS = {
+    'courses_course': (('title', 'A'), ('description', 'B')),
+    'courses_lesson': (('title', 'A'), ('description', 'B'), ('materials', 'C')),
+}
+
+
+def vector_sql(fields, prefix=''):
+    """Собирает выражение tsvector из взвешенных текстовых колонок."""
+    return ' || '.join(
+        f"setweight(to_tsvector('russian', coalesce({prefix}{field}, '')), '{weight}')"
+        for field, weight in fields
+    )
+
+
+def install_search_triggers(apps, schema_editor):
+    """Создает в PostgreSQL триггеры заполнения search_vector, GIN-индексы и заполняет векторы."""
+    if schema_editor.connection.vendor != 'postgresql':
+        # Для SQLite FTS5-индекс создается обработчиком post_migrate (courses.search)
+        return
+    for table, fields in SEARCH_FIELDS.items():
+        columns = ', '.join(field for field, _ in fields)
+        schema_editor.execute(f"""
+            CREATE OR REPLACE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector := {vector_sql(fields, 'NEW.')};
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+        schema_editor.execute(f"""
+            CREATE TRIGGER {table}_search_vector_trigger
+            BEFORE INSERT OR UPDATE OF {columns} ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update()
+        """)
+        schema_editor.execute(f'UPDATE {table} SET search_vector = {vector_sql(fields)}')
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {table}_search_vector_gin ON {table} USING GIN (search_vector)'
+        )
+
+
+def drop_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in SEARCH_FIELDS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {table}_search_vector_gin')
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {table}_search_vector_trigger ON {table}')
+        schema_editor.execute(f'DROP FUNCTION IF EXISTS {table}_search_vector_update()')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0011_stripeevent_alter_payment_payment_method'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(install_search_triggers, drop_search_triggers),
+    ]
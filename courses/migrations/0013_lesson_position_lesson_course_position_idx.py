@@ -0,0 +1,23 @@
+# Generated by Django 4.2.5 on 2026-10-18 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0012_course_search_vector_lesson_search_vector'),
+    ]
+
+    operations = [
+        # Существующие уроки получают позицию 0 и сортируются по id, поэтому их порядок не меняется
+        migrations.AddField(
+            model_name='lesson',
+            name='position',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['course', 'position', 'id'], name='lesson_course_position_idx'),
+        ),
+    ]
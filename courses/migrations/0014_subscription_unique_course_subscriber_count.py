@@ -0,0 +1,47 @@
+# Generated by Django 4.2.5 on 2026-10-18 16:00
+
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicate_subscriptions(apps, schema_editor):
+    """Оставляет по одной (самой ранней) подписке на пару пользователь — курс одним DELETE-запросом."""
+    Subscription = apps.get_model('courses', 'Subscription')
+    first_ids = (
+        Subscription.objects.order_by().values('user', 'course').annotate(first_id=Min('pk')).values('first_id')
+    )
+    Subscription.objects.exclude(pk__in=first_ids).delete()
+
+
+def backfill_subscriber_counts(apps, schema_editor):
+    """Заполняет счетчики подписчиков курсов одним UPDATE-запросом."""
+    Course = apps.get_model('courses', 'Course')
+    Subscription = apps.get_model('courses', 'Subscription')
+    subscriber_counts = (
+        Subscription.objects.filter(course=OuterRef('pk')).order_by().values('course')
+        .annotate(total=Count('pk')).values('total')
+    )
+    Course.objects.update(subscriber_count=Coalesce(Subquery(subscriber_counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0013_lesson_position_lesson_course_position_idx'),
+        ('users_app', '0003_userprofile_email_userprofile_first_name'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_subscriptions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='subscription',
+            constraint=models.UniqueConstraint(fields=('user', 'course'), name='subscription_user_course_uniq'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='subscriber_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_subscriber_counts, migrations.RunPython.noop),
+    ]
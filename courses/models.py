@@ -1,23 +1,255 @@
+import datetime
+from contextlib import contextmanager
+from contextvars import ContextVar
+from decimal import Decimal
+
 from django_filters import rest_framework as filters
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, Count, F, Max, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Now, TruncDate
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import AbstractUser, Permission, Group
 from django.conf import settings
+from django.utils import timezone
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from users_app.models import UserProfile
 
+from .cache import bump_version
+
 avatar_settings = {'null': True, 'blank': True}
 
 
+# Флаг отключения построчного обновления счетчиков уроков (для массовых операций)
+_lesson_counters_suspended = ContextVar('lesson_counters_suspended', default=False)
+
+
+@contextmanager
+def suspend_lesson_counters():
+    """
+    Отключает обработчики сигналов, обновляющие счетчики уроков построчно.
+
+    Используется массовыми операциями, которые после выполнения пересчитывают
+    счетчики затронутых курсов одним запросом.
+
+    """
+    token = _lesson_counters_suspended.set(True)
+    try:
+        yield
+    finally:
+        _lesson_counters_suspended.reset(token)
+
+
+def lesson_counters_suspended():
+    """Возвращает True, если построчное обновление счетчиков отключено."""
+    return _lesson_counters_suspended.get()
+
+
+class CourseQuerySet(models.QuerySet):
+    """
+    QuerySet курсов, инвалидирующий кеш ответов при массовых операциях.
+
+    Массовые операции не вызывают сигналы построчно, поэтому после их выполнения
+    увеличивается версия всех курсов, а время изменения проставляется самим запросом.
+
+    """
+
+    def update(self, **kwargs):
+        """Обновляет курсы, проставляя время изменения, и инвалидирует кеш ответов."""
+        kwargs.setdefault('updated_at', Now())
+        rows = super().update(**kwargs)
+        if rows:
+            bump_version('courses.course', using=self.db)
+        return rows
+
+    def with_lesson_count(self):
+        """
+        Добавляет к курсам аннотацию ``num_lessons_annotated`` через COUNT в том же запросе.
+
+        Returns:
+            QuerySet: Курсы с аннотацией количества уроков.
+
+        """
+        return self.annotate(num_lessons_annotated=Count('lesson'))
+
+    def update_course(self, course_id, **kwargs):
+        """
+        Обновляет один курс и увеличивает версию только этого курса.
+
+        Используется счетчиками, которые меняются при каждом изменении урока или подписки:
+        версия ``bulk`` при этом не меняется, и кеш остальных курсов сохраняется.
+
+        Args:
+            course_id (int): Идентификатор курса.
+            **kwargs: Значения полей для UPDATE.
+
+        """
+        kwargs.setdefault('updated_at', Now())
+        # Базовый update: версию всех курсов здесь не увеличиваем
+        models.QuerySet.update(self.filter(pk=course_id), **kwargs)
+        bump_version('courses.course', course_id, using=self.db)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        """Обновляет курсы пачкой, проставляя время изменения, и инвалидирует кеш ответов."""
+        objs = list(objs)
+        fields = list(fields)
+        # bulk_update не вызывает pre_save, поэтому время изменения проставляем сами
+        now = timezone.now()
+        for obj in objs:
+            obj.updated_at = now
+        if 'updated_at' not in fields:
+            fields.append('updated_at')
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        bump_version('courses.course', using=self.db)
+        return rows
+
+    def delete(self):
+        """Удаляет курсы и инвалидирует кеш ответов."""
+        result = super().delete()
+        bump_version('courses.course', using=self.db)
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+class CourseManager(models.Manager.from_queryset(CourseQuerySet)):
+    """
+    Менеджер для управления курсами.
+
+    Методы:
+        active_courses(): Получает активные курсы.
+        with_lesson_count(): Добавляет аннотацию с количеством уроков.
+        adjust_lesson_count(): Изменяет счетчик уроков курса на заданную величину.
+        refresh_lesson_counts(): Пересчитывает счетчики уроков одним запросом.
+        refresh_subscriber_counts(): Пересчитывает счетчики подписчиков одним запросом.
+
+    """
+
+    def get_queryset(self):
+        # Поисковый вектор нужен только в условиях запроса, не загружаем его в экземпляры
+        return super().get_queryset().defer('search_vector')
+
+    def active_courses(self):
+        """
+        Получает активные курсы.
+
+        Returns:
+            QuerySet: Активные курсы.
+
+        """
+        return self.filter(active=True)
+
+    def adjust_lesson_count(self, course_id, delta):
+        """
+        Атомарно изменяет счетчик уроков курса.
+
+        Args:
+            course_id (int): Идентификатор курса.
+            delta (int): Величина изменения счетчика.
+
+        """
+        if course_id is None or not delta:
+            return
+        self.update_course(course_id, lesson_count=F('lesson_count') + delta)
+
+    def refresh_lesson_counts(self, course_ids=None):
+        """
+        Пересчитывает счетчики уроков по фактическим данным одним UPDATE-запросом.
+
+        Обновляются только курсы с расходящимся счетчиком, поэтому время изменения (и ETag)
+        остальных курсов не меняется.
+
+        Args:
+            course_ids (Iterable[int] | None): Курсы для пересчета. None — все курсы.
+
+        Returns:
+            int: Количество курсов, счетчик которых был исправлен.
+
+        """
+        queryset = self.all()
+        if course_ids is not None:
+            course_ids = {course_id for course_id in course_ids if course_id is not None}
+            if not course_ids:
+                return 0
+            queryset = queryset.filter(pk__in=course_ids)
+        actual = self.actual_lesson_count()
+        return queryset.exclude(lesson_count=actual).update(lesson_count=actual)
+
+    @staticmethod
+    def actual_lesson_count():
+        """
+        Возвращает выражение с фактическим количеством уроков курса (коррелированный подзапрос).
+
+        Returns:
+            Coalesce: Выражение для annotate()/update().
+
+        """
+        lesson_counts = (
+            Lesson.objects.filter(course=OuterRef('pk'))
+            .order_by()
+            .values('course')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        return Coalesce(Subquery(lesson_counts), 0)
+
+    def refresh_subscriber_counts(self, course_ids=None):
+        """
+        Пересчитывает счетчики подписчиков по фактическим данным одним UPDATE-запросом.
+
+        Обновляются только курсы с расходящимся счетчиком, поэтому время изменения (и ETag)
+        остальных курсов не меняется.
+
+        Args:
+            course_ids (Iterable[int] | None): Курсы для пересчета. None — все курсы.
+
+        Returns:
+            int: Количество курсов, счетчик которых был исправлен.
+
+        """
+        queryset = self.all()
+        if course_ids is not None:
+            queryset = queryset.filter(pk__in=set(course_ids))
+        actual = self.actual_subscriber_count()
+        return queryset.exclude(subscriber_count=actual).update(subscriber_count=actual)
+
+    @staticmethod
+    def actual_subscriber_count():
+        """
+        Возвращает выражение с фактическим количеством подписчиков курса (коррелированный подзапрос).
+
+        Returns:
+            Coalesce: Выражение для annotate()/update().
+
+        """
+        subscriber_counts = (
+            Subscription.objects.filter(course=OuterRef('pk'))
+            .order_by()
+            .values('course')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        return Coalesce(Subquery(subscriber_counts), 0)
+
+
 class Course(models.Model):
     """Модель для курса."""
-    objects = None
     title = models.CharField(max_length=100)
     preview_image = models.ImageField(upload_to='course_previews/', **avatar_settings)
     description = models.CharField(max_length=255)
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
                               default=1)
+    # Денормализованный счетчик уроков, поддерживается сигналами и LessonQuerySet
+    lesson_count = models.PositiveIntegerField(default=0, editable=False)
+    # Денормализованный счетчик подписчиков, поддерживается сигналами и SubscriptionManager
+    subscriber_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # tsvector по title/description, заполняется триггером БД (см. courses/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = CourseManager()
 
     def __str__(self):
         """Возвращает строковое представление курса."""
@@ -33,9 +265,122 @@ class CustomUser(AbstractUser):
         return self.username
 
 
-class LessonManager(models.Manager):
+class LessonQuerySet(models.QuerySet):
+    """
+    QuerySet уроков, поддерживающий счетчики уроков курсов при массовых операциях.
+
+    Массовые операции не вызывают сигналы построчно, поэтому после их выполнения
+    счетчики затронутых курсов пересчитываются одним запросом.
+
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """Создает уроки пачкой и пересчитывает счетчики их курсов."""
+        objs = list(objs)
+        self.assign_positions(objs)
+        created = super().bulk_create(objs, *args, **kwargs)
+        Course.objects.refresh_lesson_counts(obj.course_id for obj in objs)
+        bump_version('courses.lesson', using=self.db)
+        return created
+
+    def assign_positions(self, objs):
+        """
+        Ставит уроки без позиции (0) в конец их курсов.
+
+        Последние позиции всех затронутых курсов читаются одним запросом по индексу (course, position).
+
+        Args:
+            objs (list[Lesson]): Новые уроки.
+
+        """
+        pending = [obj for obj in objs if obj.course_id is not None and not obj.position]
+        if not pending:
+            return
+        last_positions = dict(
+            self.model.objects.filter(course_id__in={obj.course_id for obj in pending})
+            .values('course_id').annotate(last=Max('position')).values_list('course_id', 'last')
+        )
+        for obj in pending:
+            obj.position = last_positions.get(obj.course_id, 0) + 1
+            last_positions[obj.course_id] = obj.position
+
+    def reorder(self, course_id, lesson_ids):
+        """
+        Расставляет уроки курса в заданном порядке одним UPDATE.
+
+        Уроки получают позиции 1..n в порядке ``lesson_ids``; остальные уроки курса не меняются.
+
+        Args:
+            course_id (int): Идентификатор курса.
+            lesson_ids (list[int]): Идентификаторы уроков в новом порядке.
+
+        Returns:
+            int: Количество обновленных уроков.
+
+        """
+        if not lesson_ids:
+            return 0
+        return self.filter(course_id=course_id, pk__in=lesson_ids).update(position=Case(
+            *(When(pk=pk, then=Value(position)) for position, pk in enumerate(lesson_ids, start=1)),
+            output_field=models.PositiveIntegerField(),
+        ))
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        """Обновляет уроки пачкой; при смене курса пересчитывает старые и новые курсы."""
+        objs = list(objs)
+        fields = list(fields)
+        moves_course = 'course' in fields or 'course_id' in fields
+        if moves_course:
+            affected = set(
+                self.model.objects.filter(pk__in=[obj.pk for obj in objs]).values_list('course_id', flat=True)
+            )
+        # bulk_update не вызывает pre_save, поэтому время изменения проставляем сами
+        now = timezone.now()
+        for obj in objs:
+            obj.updated_at = now
+        if 'updated_at' not in fields:
+            fields.append('updated_at')
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        if moves_course:
+            affected.update(obj.course_id for obj in objs)
+            Course.objects.refresh_lesson_counts(affected)
+        bump_version('courses.lesson', using=self.db)
+        return rows
+
+    def update(self, **kwargs):
+        """Обновляет уроки; при смене курса пересчитывает старые и новые курсы."""
+        moves_course = 'course' in kwargs or 'course_id' in kwargs
+        if moves_course:
+            affected = set(self.values_list('course_id', flat=True))
+        kwargs.setdefault('updated_at', Now())
+        rows = super().update(**kwargs)
+        if moves_course:
+            new_course = kwargs.get('course', kwargs.get('course_id'))
+            affected.add(getattr(new_course, 'pk', new_course))
+            Course.objects.refresh_lesson_counts(affected)
+        bump_version('courses.lesson', using=self.db)
+        return rows
+
+    def delete(self):
+        """Удаляет уроки и пересчитывает счетчики затронутых курсов одним запросом."""
+        affected = set(self.values_list('course_id', flat=True))
+        with suspend_lesson_counters():
+            result = super().delete()
+        Course.objects.refresh_lesson_counts(affected)
+        bump_version('courses.lesson', using=self.db)
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+class LessonManager(models.Manager.from_queryset(LessonQuerySet)):
     """Менеджер для управления уроками."""
 
+    def get_queryset(self):
+        # Поисковый вектор нужен только в условиях запроса, не загружаем его в экземпляры
+        return super().get_queryset().defer('search_vector')
+
     def active_lessons(self):
         """Возвращает активные уроки."""
         return self.filter(active=True)
@@ -49,12 +394,25 @@ class Lesson(models.Model):
     video_links = models.URLField()
     materials = models.TextField()
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, default=1)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, null=True, blank=True)
+    # Порядок урока в курсе; 0 — «в конец курса», позиция назначается при создании
+    position = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # tsvector по title/description/materials, заполняется триггером БД (см. courses/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает исходный курс урока, чтобы отследить перенос в другой курс."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_course_id = instance.__dict__.get('course_id')
+        return instance
 
     def save(self, *args, **kwargs):
         """
         Переопределенный метод сохранения урока.
 
-        Проверяет каждую ссылку в материалах и разрешает только ссылки на YouTube.
+        Проверяет все ссылки в материалах за один проход и разрешает только ссылки на YouTube.
 
         Args:
             *args: Аргументы.
@@ -64,11 +422,12 @@ class Lesson(models.Model):
             ValidationError: Если найдены ссылки на сторонние ресурсы, отличные от YouTube.
 
         """
-        # Проверка каждой ссылки в материалах
-        from myproject.utils import is_youtube_link
-        for link in self.materials.split('\n'):
-            if not is_youtube_link(link):
-                raise ValidationError('В материалах разрешены только ссылки на YouTube.')
+        from myproject.utils import find_invalid_links, format_invalid_links
+        invalid = find_invalid_links(self.materials)
+        if invalid:
+            raise ValidationError(format_invalid_links(invalid))
+        if self._state.adding:
+            Lesson.objects.assign_positions([self])
         super().save(*args, **kwargs)
 
     objects = LessonManager()
@@ -77,6 +436,83 @@ class Lesson(models.Model):
         """Возвращает строковое представление урока."""
         return self.title
 
+    class Meta:
+        indexes = [
+            # Список уроков курса по порядку (keyset по position, id)
+            models.Index(fields=['course', 'position', 'id'], name='lesson_course_position_idx'),
+        ]
+
+
+class SubscriptionManager(models.Manager):
+    """
+    Менеджер подписок с массовой подпиской и отпиской.
+
+    Массовые операции не вызывают сигналы построчно, поэтому счетчик подписчиков курса
+    изменяется ими на точную величину в той же транзакции, а строка курса блокируется,
+    чтобы параллельные запросы не исказили счетчик. Остальные изменения подписок
+    (create/save/delete, каскадное удаление) учитываются сигналами.
+    """
+    batch_size = 1000
+
+    def subscribe(self, course_id, profile_ids):
+        """
+        Подписывает профили на курс; существующие подписки и несуществующие профили пропускаются.
+
+        Args:
+            course_id (int): Идентификатор курса.
+            profile_ids (Iterable[int]): Идентификаторы профилей пользователей.
+
+        Returns:
+            int: Количество новых подписок.
+
+        """
+        with transaction.atomic():
+            Course.objects.select_for_update().filter(pk=course_id).values_list('pk').first()
+            profile_ids = set(UserProfile.objects.filter(pk__in=set(profile_ids)).values_list('pk', flat=True))
+            profile_ids -= set(
+                self.filter(course_id=course_id, user_id__in=profile_ids).values_list('user_id', flat=True)
+            )
+            self.bulk_create(
+                [Subscription(user_id=profile_id, course_id=course_id) for profile_id in profile_ids],
+                batch_size=self.batch_size, ignore_conflicts=True,
+            )
+            self.adjust_subscriber_count(course_id, len(profile_ids))
+        return len(profile_ids)
+
+    def unsubscribe(self, course_id, profile_ids):
+        """
+        Отписывает профили от курса одним DELETE-запросом.
+
+        Args:
+            course_id (int): Идентификатор курса.
+            profile_ids (Iterable[int]): Идентификаторы профилей пользователей.
+
+        Returns:
+            int: Количество удаленных подписок.
+
+        """
+        with transaction.atomic():
+            Course.objects.select_for_update().filter(pk=course_id).values_list('pk').first()
+            # На подписки никто не ссылается: удаляем одним DELETE без сбора объектов и сигналов
+            queryset = self.filter(course_id=course_id, user_id__in=set(profile_ids))
+            deleted = queryset._raw_delete(queryset.db)
+            self.adjust_subscriber_count(course_id, -deleted)
+        return deleted
+
+    @staticmethod
+    def adjust_subscriber_count(course_id, delta):
+        """
+        Атомарно изменяет счетчик подписчиков курса.
+
+        Args:
+            course_id (int): Идентификатор курса.
+            delta (int): Величина изменения счетчика.
+
+        """
+        if course_id is None or not delta:
+            return
+        Course.objects.update_course(course_id, subscriber_count=F('subscriber_count') + delta)
+
 
 class Subscription(models.Model):
     """
@@ -95,28 +531,92 @@ class Subscription(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
     subscribed_at = models.DateTimeField(auto_now_add=True)
 
+    objects = SubscriptionManager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает исходный курс подписки, чтобы отследить перенос в другой курс."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_course_id = instance.__dict__.get('course_id')
+        return instance
+
     def __str__(self):
         return f"{self.user.username} подписан на {self.course.title}"
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'course'], name='subscription_user_course_uniq'),
+        ]
+
 
-class CourseManager(models.Manager):
+class PaymentManager(models.Manager):
     """
-    Менеджер для управления курсами.
+    Менеджер платежей.
 
     Методы:
-        active_courses(): Получает активные курсы.
+        resolve_paid_items(): Заполняет course/lesson по content_type/object_id.
+        backfill_paid_items(): Заполняет course/lesson у существующих платежей set-based запросами.
 
     """
 
-    def active_courses(self):
+    def resolve_paid_items(self, payments):
         """
-        Получает активные курсы.
+        Заполняет ссылки на курс и урок по оплаченному объекту для набора платежей.
+
+        Существующие курсы и курсы уроков загружаются одним запросом на весь набор.
+
+        Args:
+            payments (Iterable[Payment]): Несохраненные или измененные платежи.
+
+        """
+        course_type = ContentType.objects.get_for_model(Course)
+        lesson_type = ContentType.objects.get_for_model(Lesson)
+        payments = list(payments)
+        course_ids = {p.object_id for p in payments if p.content_type_id == course_type.pk}
+        lesson_ids = {p.object_id for p in payments if p.content_type_id == lesson_type.pk}
+        existing_courses = set(
+            Course.objects.filter(pk__in=course_ids).values_list('pk', flat=True)
+        ) if course_ids else set()
+        lesson_courses = dict(
+            Lesson.objects.filter(pk__in=lesson_ids).values_list('pk', 'course_id')
+        ) if lesson_ids else {}
+        for payment in payments:
+            payment.course_id = payment.lesson_id = None
+            if payment.content_type_id == course_type.pk and payment.object_id in existing_courses:
+                payment.course_id = payment.object_id
+            elif payment.content_type_id == lesson_type.pk and payment.object_id in lesson_courses:
+                payment.lesson_id = payment.object_id
+                payment.course_id = lesson_courses[payment.object_id]
+
+    def backfill_paid_items(self, batch_size=50000):
+        """
+        Заполняет ссылки на курс и урок у существующих платежей диапазонами первичных ключей.
+
+        Args:
+            batch_size (int): Ширина диапазона первичных ключей для одного UPDATE.
 
         Returns:
-            QuerySet: Активные курсы.
+            int: Количество обновленных платежей.
 
         """
-        return self.filter(active=True)
+        course_type = ContentType.objects.get_for_model(Course)
+        lesson_type = ContentType.objects.get_for_model(Lesson)
+        bounds = self.aggregate(first=models.Min('pk'), last=models.Max('pk'))
+        if bounds['first'] is None:
+            return 0
+        updated = 0
+        for start in range(bounds['first'], bounds['last'] + 1, batch_size):
+            batch = self.filter(pk__gte=start, pk__lt=start + batch_size)
+            updated += batch.filter(
+                content_type=course_type, object_id__in=Course.objects.values('pk'),
+            ).update(course_id=F('object_id'), lesson_id=None)
+            updated += batch.filter(
+                content_type=lesson_type, object_id__in=Lesson.objects.values('pk'),
+            ).update(
+                lesson_id=F('object_id'),
+                course_id=Subquery(Lesson.objects.filter(pk=OuterRef('object_id')).values('course_id')[:1]),
+            )
+        return updated
 
 
 class Payment(models.Model):
@@ -131,6 +631,7 @@ class Payment(models.Model):
         choices=[
             ('cash', 'Наличные'),
             ('bank_transfer', 'Банковский перевод'),
+            ('stripe', 'Stripe'),
         ],
         verbose_name="Способ оплаты"
     )
@@ -139,25 +640,194 @@ class Payment(models.Model):
     some_course_field = models.CharField(max_length=100, verbose_name="Дополнительное поле из курса", blank=True)
     some_lesson_field = models.CharField(max_length=100, verbose_name="Дополнительное поле из урока", blank=True)
 
+    # Разрешенные из paid_item ссылки для индексируемой фильтрации (для урока — также его курс)
+    course = models.ForeignKey(Course, on_delete=models.SET_NULL, null=True, blank=True,
+                               related_name='payments', verbose_name="Курс")
+    lesson = models.ForeignKey(Lesson, on_delete=models.SET_NULL, null=True, blank=True,
+                               related_name='payments', verbose_name="Урок")
+
+    objects = PaymentManager()
+
+    def save(self, *args, **kwargs):
+        """Заполняет ссылки на курс и урок по оплаченному объекту перед сохранением."""
+        Payment.objects.resolve_paid_items([self])
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f'Платеж за {self.paid_item} от {self.user}'
 
     class Meta:
         verbose_name = "Платеж"
         verbose_name_plural = "Платежи"
+        indexes = [
+            # Составной индекс для keyset-пагинации по дате оплаты
+            models.Index(fields=['date_paid', 'id'], name='payment_date_paid_id_idx'),
+            models.Index(fields=['content_type', 'object_id'], name='payment_paid_item_idx'),
+        ]
 
 
 class PaymentFilter(filters.FilterSet):
-    course = filters.CharFilter(field_name='paid_item', method='filter_course')
-    lesson = filters.CharFilter(field_name='paid_item', method='filter_lesson')
+    # Фильтрация по индексированным внешним ключам вместо недоступных для JOIN GenericForeignKey
+    course = filters.NumberFilter(field_name='course_id')
+    lesson = filters.NumberFilter(field_name='lesson_id')
     payment_method = filters.CharFilter(field_name='payment_method')
 
     class Meta:
         model = Payment
         fields = []
 
-    def filter_course(self, queryset, name, value):
-        return queryset.filter(paid_item__course__title=value)
 
-    def filter_lesson(self, queryset, name, value):
-        return queryset.filter(paid_item__lesson__title=value)
+class StripeEvent(models.Model):
+    """
+    Событие Stripe, принятое вебхуком и ожидающее обработки.
+
+    Вебхук только сохраняет событие (уникальность event_id отсекает повторные доставки),
+    а платежи создаются пачками задачей courses.tasks.ingest_stripe_events.
+
+    Fields:
+        event_id (str): Идентификатор события Stripe.
+        event_type (str): Тип события.
+        payload (dict): Объект события.
+        received_at (datetime): Время получения.
+        processed_at (datetime): Время обработки; пусто, пока событие в очереди.
+        error (str): Причина, по которой платеж не был создан.
+
+    """
+    event_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=100)
+    payload = models.JSONField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    error = models.CharField(max_length=255, blank=True)
+
+    def __str__(self):
+        return f'{self.event_type} {self.event_id}'
+
+    class Meta:
+        verbose_name = "Событие Stripe"
+        verbose_name_plural = "События Stripe"
+        indexes = [
+            # Частичный индекс очереди необработанных событий
+            models.Index(fields=['id'], condition=models.Q(processed_at__isnull=True),
+                         name='stripe_event_pending_idx'),
+        ]
+
+
+class DailyRevenueManager(models.Manager):
+    """
+    Менеджер дневных сводок выручки.
+
+    Методы:
+        record_payments(): Инкрементально добавляет платежи в сводки.
+        rebuild(): Пересчитывает сводки за диапазон дат по таблице платежей.
+
+    """
+
+    def record_payments(self, payments):
+        """
+        Добавляет суммы платежей в дневные сводки (UPDATE с F-выражением или INSERT).
+
+        Args:
+            payments (Iterable[Payment]): Новые платежи.
+
+        """
+        totals = {}
+        for payment in payments:
+            paid_at = payment.date_paid
+            day = timezone.localtime(paid_at).date() if timezone.is_aware(paid_at) else paid_at.date()
+            key = (day, payment.course_id, payment.payment_method)
+            amount, count = totals.get(key, (Decimal('0'), 0))
+            totals[key] = (amount + Decimal(payment.amount), count + 1)
+
+        for (day, course_id, payment_method), (amount, count) in totals.items():
+            rows = self.filter(day=day, course_id=course_id, payment_method=payment_method)
+            increment = {'total_amount': F('total_amount') + amount, 'payments_count': F('payments_count') + count}
+            if rows.update(**increment):
+                continue
+            try:
+                with transaction.atomic():
+                    self.create(day=day, course_id=course_id, payment_method=payment_method,
+                                total_amount=amount, payments_count=count)
+            except IntegrityError:
+                # Строку одновременно создал другой процесс — добавляем к ней
+                rows.update(**increment)
+
+    def rebuild(self, date_from, date_to):
+        """
+        Пересчитывает сводки за диапазон дат по таблице платежей.
+
+        Args:
+            date_from (date): Первый день диапазона.
+            date_to (date): Последний день диапазона (включительно).
+
+        Returns:
+            int: Количество созданных строк сводки.
+
+        """
+        # Границы дней в текущем часовом поясе, чтобы выборка шла по индексу date_paid
+        start = timezone.make_aware(datetime.datetime.combine(date_from, datetime.time.min))
+        end = timezone.make_aware(datetime.datetime.combine(date_to + datetime.timedelta(days=1), datetime.time.min))
+        aggregated = (
+            Payment.objects.filter(date_paid__gte=start, date_paid__lt=end)
+            .annotate(day=TruncDate('date_paid'))
+            .order_by()
+            .values('day', 'course_id', 'payment_method')
+            .annotate(total_amount=Sum('amount'), payments_count=Count('pk'))
+        )
+        with transaction.atomic():
+            self.filter(day__gte=date_from, day__lte=date_to).delete()
+            created = self.bulk_create(
+                [self.model(**row) for row in aggregated.iterator(chunk_size=5000)],
+                batch_size=5000,
+            )
+        return len(created)
+
+
+class DailyRevenue(models.Model):
+    """
+    Дневная сводка выручки по курсу и способу оплаты.
+
+    Обновляется инкрементально при создании платежа, поэтому отчеты о выручке
+    читают O(дней) строк вместо суммирования всей таблицы платежей.
+
+    Fields:
+        day (date): День оплаты.
+        course (Course): Курс (для оплаты урока — его курс); пусто, если не определен.
+        payment_method (str): Способ оплаты.
+        total_amount (Decimal): Сумма платежей.
+        payments_count (int): Количество платежей.
+
+    """
+    day = models.DateField(verbose_name="День")
+    # Без ограничения внешнего ключа: история выручки сохраняется после удаления курса
+    course = models.ForeignKey(Course, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+                               related_name='+', verbose_name="Курс")
+    payment_method = models.CharField(max_length=20, verbose_name="Способ оплаты")
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Сумма")
+    payments_count = models.PositiveIntegerField(default=0, verbose_name="Количество платежей")
+
+    objects = DailyRevenueManager()
+
+    def __str__(self):
+        return f'{self.day}: {self.total_amount} ({self.payment_method})'
+
+    class Meta:
+        verbose_name = "Дневная выручка"
+        verbose_name_plural = "Дневная выручка"
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'course', 'payment_method'],
+                                    condition=models.Q(course__isnull=False), name='daily_revenue_course_uniq'),
+            models.UniqueConstraint(fields=['day', 'payment_method'],
+                                    condition=models.Q(course__isnull=True), name='daily_revenue_no_course_uniq'),
+        ]
+
+
+class DailyRevenueFilter(filters.FilterSet):
+    date_from = filters.DateFilter(field_name='day', lookup_expr='gte')
+    date_to = filters.DateFilter(field_name='day', lookup_expr='lte')
+    course = filters.NumberFilter(field_name='course_id')
+    payment_method = filters.CharFilter(field_name='payment_method')
+
+    class Meta:
+        model = DailyRevenue
+        fields = []
@@ -0,0 +1,264 @@
+import base64
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset-пагинация по паре (поле сортировки, id).
+
+    Позиция страницы кодируется в непрозрачном курсоре, а выборка следующей страницы
+    выполняется условием ``(field, id) > (value, last_id)`` по составному индексу,
+    поэтому глубокие страницы стоят столько же, сколько первая: без OFFSET и COUNT.
+
+    Attributes:
+        ordering_field (str): Поле сортировки.
+        default_ordering (str): Направление по умолчанию (``field`` или ``-field``).
+        page_size (int): Размер страницы по умолчанию.
+        max_page_size (int): Максимальный размер страницы.
+
+    """
+    ordering_field = None
+    default_ordering = None
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering_query_param = 'ordering'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Возвращает одну страницу записей, начиная с позиции курсора.
+
+        Args:
+            queryset (QuerySet): Отфильтрованный набор записей.
+            request (Request): Текущий запрос.
+            view (APIView): Представление.
+
+        Returns:
+            list: Записи текущей страницы.
+
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.descending = self.get_ordering(request).startswith('-')
+        cursor = self.decode_cursor(request, queryset.model)
+        reverse = cursor is not None and cursor['reverse']
+
+        # При движении назад идем в обратном направлении и затем разворачиваем страницу
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(f'{prefix}{self.ordering_field}', f'{prefix}id')
+        if cursor is not None:
+            queryset = queryset.filter(self.position_filter(cursor['value'], cursor['id'], descending))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.has_next = has_more if not reverse else True
+        self.has_previous = (cursor is not None) if not reverse else has_more
+        self.first = rows[0] if rows else None
+        self.last = rows[-1] if rows else None
+        return rows
+
+    def position_filter(self, value, pk, descending):
+        """
+        Строит условие строгого сравнения кортежа (field, id) с позицией курсора.
+
+        Условие с OR само по себе не ограничивает диапазон индекса, поэтому к нему
+        добавляется нестрогая граница по полю сортировки: по ней индекс (field, id)
+        читается сразу с позиции курсора, а не с начала.
+        """
+        lookup = 'lt' if descending else 'gt'
+        bound = 'lte' if descending else 'gte'
+        return Q(**{f'{self.ordering_field}__{bound}': value}) & (
+            Q(**{f'{self.ordering_field}__{lookup}': value})
+            | Q(**{self.ordering_field: value, f'id__{lookup}': pk})
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        return self.build_link(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first is None:
+            return None
+        return self.build_link(self.first, reverse=True)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_query_param, '').split(',')[0].strip()
+        if ordering.lstrip('-') == self.ordering_field:
+            return ordering
+        return self.default_ordering
+
+    def build_link(self, obj, reverse):
+        # Страница может состоять из экземпляров моделей или из строк values()
+        if isinstance(obj, dict):
+            value, pk = obj[self.ordering_field], obj['id']
+        else:
+            value, pk = getattr(obj, self.ordering_field), obj.pk
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        payload = json.dumps({'v': value, 'i': pk, 'r': reverse}, separators=(',', ':'))
+        token = base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, token)
+
+    def decode_cursor(self, request, model):
+        """
+        Разбирает курсор из запроса.
+
+        Значения приводятся полями модели (``to_python`` и валидаторы), поэтому подделанный
+        курсор с некорректным значением дает 404, а не ошибку при выполнении запроса.
+
+        Args:
+            request (Request): Текущий запрос.
+            model (type): Модель пагинируемых записей.
+
+        Returns:
+            dict | None: ``value``, ``id`` и ``reverse`` или None, если курсора нет.
+
+        Raises:
+            NotFound: Если курсор некорректен.
+
+        """
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            data = json.loads(payload)
+            return {
+                'value': self.clean_cursor_value(model._meta.get_field(self.ordering_field), data['v']),
+                'id': self.clean_cursor_value(model._meta.pk, data['i']),
+                'reverse': bool(data['r']),
+            }
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound('Некорректный курсор.')
+
+    @staticmethod
+    def clean_cursor_value(field, value):
+        if value is None or isinstance(value, (bool, dict, list)):
+            raise ValueError(value)
+        value = field.to_python(value)
+        field.run_validators(value)
+        # Валидаторы диапазона есть не у всех СУБД (в SQLite их нет), а 64 бит не превышает ни одна
+        if isinstance(value, int) and not -2 ** 63 <= value < 2 ** 63:
+            raise ValueError(value)
+        return value
+
+
+class LessonPositionPagination(KeysetPagination):
+    """Keyset-пагинация уроков курса по (position, id)."""
+    ordering_field = 'position'
+    default_ordering = 'position'
+
+
+class PaymentCursorPagination(KeysetPagination):
+    """Keyset-пагинация платежей по (date_paid, id)."""
+    ordering_field = 'date_paid'
+    default_ordering = '-date_paid'
+
+
+class SearchPagination(BasePagination):
+    """
+    Постраничная выдача результатов поиска, отсортированных по релевантности.
+
+    Порядок по рангу не индексируется, поэтому keyset-пагинация неприменима; вместо нее
+    используется номер страницы, но без COUNT(*): наличие следующей страницы определяется
+    выборкой одной лишней записи. Глубина ограничена ``max_page``.
+    """
+    page_size = 20
+    max_page_size = 100
+    max_page = 50
+    page_query_param = 'page'
+    page_size_query_param = 'page_size'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.page = self.get_page(request)
+        offset = (self.page - 1) * self.page_size
+        rows = list(queryset[offset:offset + self.page_size + 1])
+        self.has_next = len(rows) > self.page_size and self.page < self.max_page
+        return rows[:self.page_size]
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.page_query_param, self.page + 1)
+
+    def get_previous_link(self):
+        if self.page == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page - 1)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_page(self, request):
+        try:
+            page = int(request.query_params.get(self.page_query_param, 1))
+        except (TypeError, ValueError):
+            raise NotFound('Некорректный номер страницы.')
+        if not 1 <= page <= self.max_page:
+            raise NotFound('Некорректный номер страницы.')
+        return page
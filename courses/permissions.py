@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from users_app.permissions import is_moderator
+
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
 
@@ -8,15 +10,14 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
 
-        # Разрешено редактировать только владельцу
-        return obj.owner == request.user
+        # Разрешено редактировать только владельцу (сравниваем id, не загружая владельца)
+        return obj.owner_id == request.user.pk
 
 
 class IsModerator(permissions.BasePermission):
     """
-        Проверка, является ли пользователь модератором (с правами is_staff).
+        Проверка, является ли пользователь модератором (is_staff или группа «Модераторы»).
         """
 
     def has_permission(self, request, view):
-        return request.user and request.user.is_staff
-
+        return is_moderator(request.user)
@@ -0,0 +1,113 @@
+"""
+Полнотекстовый поиск по курсам и урокам.
+
+В PostgreSQL поиск идет по колонкам ``search_vector`` (tsvector) с GIN-индексами.
+Колонки заполняются триггерами БД (миграция 0012), поэтому остаются актуальными и при
+``bulk_create``/``bulk_update``/``QuerySet.update`` и загрузке через COPY, минуя сигналы.
+
+Для локальных тестов на SQLite используются внешние FTS5-таблицы ``<таблица>_fts``
+с триггерами синхронизации. SQLite пересоздает таблицу при изменении схемы и теряет
+ее триггеры, поэтому FTS5-индекс восстанавливается после каждой миграции (post_migrate).
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F
+from django.db.models.expressions import RawSQL
+
+from .models import Course, Lesson
+
+# Конфигурация текстового поиска PostgreSQL; должна совпадать с триггерами миграции 0012
+SEARCH_CONFIG = 'russian'
+
+# Веса колонок для bm25 в SQLite, аналог весов A/B/C в PostgreSQL
+SQLITE_WEIGHTS = (10.0, 4.0, 1.0)
+
+# Индексируемые поля в порядке убывания веса
+SEARCH_FIELDS = {
+    Course: ('title', 'description'),
+    Lesson: ('title', 'description', 'materials'),
+}
+
+
+def search(queryset, query):
+    """
+    Фильтрует набор курсов или уроков по поисковому запросу и сортирует по релевантности.
+
+    Args:
+        queryset (QuerySet): Набор Course или Lesson.
+        query (str): Поисковый запрос пользователя.
+
+    Returns:
+        QuerySet: Подходящие записи с аннотацией ``rank``, от самых релевантных.
+
+    """
+    query = query.strip()
+    if not query:
+        return queryset.none()
+    if connections[queryset.db].vendor == 'postgresql':
+        return _search_postgresql(queryset, query)
+    return _search_sqlite(queryset, query)
+
+
+def _search_postgresql(queryset, query):
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+    return (
+        queryset.filter(search_vector=search_query)
+        .annotate(rank=SearchRank(F('search_vector'), search_query))
+        .order_by('-rank', 'pk')
+    )
+
+
+def _search_sqlite(queryset, query):
+    table = queryset.model._meta.db_table
+    fts_table = f'{table}_fts'
+    weights = ', '.join(str(weight) for weight in SQLITE_WEIGHTS[:len(SEARCH_FIELDS[queryset.model])])
+    # Каждое слово ищем как префикс, экранируя кавычки синтаксиса FTS5
+    match = ' '.join('"{}"*'.format(term.replace('"', '""')) for term in query.split())
+    return (
+        queryset.filter(pk__in=RawSQL(f'SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH %s', (match,)))
+        .annotate(rank=RawSQL(
+            f'SELECT -bm25({fts_table}, {weights}) FROM {fts_table} WHERE {fts_table} MATCH %s AND rowid = {table}.id',
+            (match,),
+        ))
+        .order_by('-rank', 'pk')
+    )
+
+
+def install_sqlite_search(using='default'):
+    """
+    Создает FTS5-таблицы и триггеры синхронизации в SQLite и перестраивает индекс.
+
+    Операция идемпотентна и ничего не делает на других СУБД.
+
+    Args:
+        using (str): Алиас базы данных.
+
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        existing_tables = set(connection.introspection.table_names(cursor))
+        for model, fields in SEARCH_FIELDS.items():
+            table = model._meta.db_table
+            if table not in existing_tables:
+                continue
+            fts_table = f'{table}_fts'
+            columns = ', '.join(fields)
+            new_values = ', '.join(f'new.{field}' for field in fields)
+            old_values = ', '.join(f'old.{field}' for field in fields)
+            insert_new = f'INSERT INTO {fts_table}(rowid, {columns}) VALUES (new.id, {new_values});'
+            delete_old = (f"INSERT INTO {fts_table}({fts_table}, rowid, {columns}) "
+                          f"VALUES ('delete', old.id, {old_values});")
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5('
+                f"{columns}, content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} '
+                           f'BEGIN {insert_new} END')
+            cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} '
+                           f'BEGIN {delete_old} END')
+            cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE ON {table} '
+                           f'BEGIN {delete_old} {insert_new} END')
+            cursor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
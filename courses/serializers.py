@@ -1,36 +1,128 @@
+from django.db import transaction
+from django.utils.encoding import smart_str
 from rest_framework import serializers
-from .models import Course, Lesson, Payment
+from myproject.fieldsets import SparseFieldsetMixin
+from myproject.utils import find_invalid_links, format_invalid_links
+from .models import Course, DailyRevenue, Lesson, Payment
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 
-class LessonSerializer(serializers.ModelSerializer):
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Связь по первичному ключу, которая при пакетной валидации берет объекты
+    из словаря, заранее загруженного списочным сериализатором одним запросом.
+    """
+
+    def to_internal_value(self, data):
+        prefetched = getattr(self.root, 'prefetched_related', {}).get(self.field_name)
+        if prefetched is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return prefetched[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class LessonBulkSerializer(serializers.ListSerializer):
+    """
+    Списочный сериализатор уроков для пакетного создания и обновления.
+
+    Все элементы валидируются до записи (ошибки возвращаются по каждому элементу),
+    связанные курсы загружаются одним запросом, а запись выполняется через
+    bulk_create/bulk_update в одной транзакции.
+    """
+    batch_size = 1000
+
+    def run_validation(self, data=serializers.empty):
+        if isinstance(data, list):
+            course_ids = set()
+            for item in data:
+                if isinstance(item, dict) and item.get('course') not in (None, ''):
+                    course_ids.add(smart_str(item['course']))
+            valid_ids = [int(pk) for pk in course_ids if pk.isdigit()]
+            self.prefetched_related = {'course': Course.objects.in_bulk(valid_ids)}
+        return super().run_validation(data)
+
+    def create(self, validated_data):
+        lessons = [Lesson(**attrs) for attrs in validated_data]
+        with transaction.atomic():
+            return Lesson.objects.bulk_create(lessons, batch_size=self.batch_size)
+
+    def update(self, instances, validated_data):
+        fields = set()
+        for lesson, attrs in zip(instances, validated_data):
+            for attr, value in attrs.items():
+                setattr(lesson, attr, value)
+            fields.update(attrs)
+        if fields:
+            with transaction.atomic():
+                Lesson.objects.bulk_update(instances, list(fields), batch_size=self.batch_size)
+        return instances
+
+
+class LessonSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source='owner.username')
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
 
     class Meta:
         model = Lesson
-        fields = '__all__'
+        exclude = ('search_vector',)
+        list_serializer_class = LessonBulkSerializer
+
+    def validate_materials(self, value):
+        """
+        Проверяет, что все ссылки в материалах ведут на YouTube (как и Lesson.save).
+
+        Args:
+            value (str): Материалы урока, по одной ссылке в строке.
+
+        Returns:
+            str: Проверенные материалы.
+
+        Raises:
+            ValidationError: Со списком всех неподходящих строк.
+
+        """
+        invalid = find_invalid_links(value)
+        if invalid:
+            raise serializers.ValidationError(format_invalid_links(invalid))
+        return value
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     # Добавляем поле для количества уроков
     num_lessons = serializers.SerializerMethodField()
     owner = serializers.ReadOnlyField(source='owner.username')
 
     class Meta:
         model = Course
-        fields = '__all__'
+        exclude = ('lesson_count', 'search_vector')
+        field_dependencies = {'num_lessons': ('lesson_count',)}
 
     def get_num_lessons(self, obj):
-        # Получаем количество уроков для данного курса
-        return obj.lesson_set.count()
+        # Аннотация из запроса имеет приоритет, иначе используем денормализованный счетчик
+        annotated = getattr(obj, 'num_lessons_annotated', None)
+        if annotated is not None:
+            return annotated
+        return obj.lesson_count
 
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Payment
         fields = '__all__'
 
 
+class DailyRevenueSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DailyRevenue
+        fields = ('day', 'course', 'payment_method', 'total_amount', 'payments_count')
+
+
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """
     Персонализированный сериализатор для включения
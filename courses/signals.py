@@ -0,0 +1,126 @@
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from .cache import bump_version
+from .models import Course, DailyRevenue, Lesson, Payment, Subscription, lesson_counters_suspended
+from .search import install_sqlite_search
+
+
+@receiver(post_save, sender=Lesson)
+def update_lesson_count_on_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Поддерживает счетчик уроков курса при создании урока и переносе его в другой курс.
+
+    Args:
+        sender (type): Модель урока.
+        instance (Lesson): Сохраненный урок.
+        created (bool): True, если урок был создан.
+        raw (bool): True при загрузке фикстур.
+
+    """
+    if raw or lesson_counters_suspended():
+        return
+    if created:
+        previous_course_id = None
+    else:
+        # Для экземпляров, не загруженных из базы, исходный курс неизвестен — считаем его неизменным
+        previous_course_id = getattr(instance, '_loaded_course_id', instance.course_id)
+    if previous_course_id != instance.course_id:
+        Course.objects.adjust_lesson_count(previous_course_id, -1)
+        Course.objects.adjust_lesson_count(instance.course_id, 1)
+    instance._loaded_course_id = instance.course_id
+
+
+@receiver(post_delete, sender=Lesson)
+def update_lesson_count_on_delete(sender, instance, **kwargs):
+    """
+    Уменьшает счетчик уроков курса при удалении урока.
+
+    Args:
+        sender (type): Модель урока.
+        instance (Lesson): Удаленный урок.
+
+    """
+    if lesson_counters_suspended():
+        return
+    Course.objects.adjust_lesson_count(instance.course_id, -1)
+
+
+@receiver(post_save, sender=Subscription)
+def update_subscriber_count_on_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Поддерживает счетчик подписчиков курса при создании подписки и переносе ее в другой курс.
+
+    Args:
+        sender (type): Модель подписки.
+        instance (Subscription): Сохраненная подписка.
+        created (bool): True, если подписка была создана.
+        raw (bool): True при загрузке фикстур.
+
+    """
+    if raw:
+        return
+    if created:
+        previous_course_id = None
+    else:
+        # Для экземпляров, не загруженных из базы, исходный курс неизвестен — считаем его неизменным
+        previous_course_id = getattr(instance, '_loaded_course_id', instance.course_id)
+    if previous_course_id != instance.course_id:
+        Subscription.objects.adjust_subscriber_count(previous_course_id, -1)
+        Subscription.objects.adjust_subscriber_count(instance.course_id, 1)
+    instance._loaded_course_id = instance.course_id
+
+
+@receiver(post_delete, sender=Subscription)
+def update_subscriber_count_on_delete(sender, instance, **kwargs):
+    """
+    Уменьшает счетчик подписчиков курса при удалении подписки (в том числе каскадном).
+
+    Args:
+        sender (type): Модель подписки.
+        instance (Subscription): Удаленная подписка.
+
+    """
+    Subscription.objects.adjust_subscriber_count(instance.course_id, -1)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def invalidate_cached_responses(sender, instance, **kwargs):
+    """
+    Увеличивает версию модели и объекта, инвалидируя закешированные ответы API.
+
+    Args:
+        sender (type): Модель курса или урока.
+        instance (Model): Сохраненный или удаленный объект.
+
+    """
+    if sender is Lesson and lesson_counters_suspended():
+        # Массовая операция сама увеличит версию модели после завершения
+        return
+    bump_version(sender._meta.label_lower, instance.pk, using=kwargs.get('using'))
+
+
+@receiver(post_save, sender=Payment)
+def record_payment_revenue(sender, instance, created, raw=False, **kwargs):
+    """
+    Добавляет новый платеж в дневную сводку выручки.
+
+    Args:
+        sender (type): Модель платежа.
+        instance (Payment): Сохраненный платеж.
+        created (bool): True, если платеж был создан.
+        raw (bool): True при загрузке фикстур.
+
+    """
+    if created and not raw:
+        DailyRevenue.objects.record_payments([instance])
+
+
+@receiver(post_migrate)
+def install_search_index(sender, using='default', **kwargs):
+    """Восстанавливает FTS5-индекс поиска в SQLite после миграций приложения courses."""
+    if sender.label == 'courses':
+        install_sqlite_search(using)
@@ -0,0 +1,105 @@
+"""
+Клиент Stripe для обработки платежей без блокировки обработчиков запросов.
+
+Вызовы Stripe выполняются в ограниченном пуле потоков с таймаутами; каждый поток
+переиспользует собственную HTTP-сессию (keep-alive), а асинхронные представления
+ожидают результат, не занимая рабочий поток сервера.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import stripe
+from django.conf import settings
+
+
+class StripeOverloaded(Exception):
+    """Очередь запросов к Stripe заполнена."""
+
+
+_lock = threading.Lock()
+_executor = None
+_slots = None
+
+
+def configure():
+    """
+    Настраивает клиент Stripe и пул потоков по настройкам STRIPE_*.
+
+    Повторный вызов пересоздает пул (используется в тестах при изменении настроек).
+    """
+    global _executor, _slots
+    with _lock:
+        stripe.api_key = settings.STRIPE_SECRET_KEY
+        stripe.api_base = settings.STRIPE_API_BASE
+        stripe.max_network_retries = settings.STRIPE_MAX_NETWORK_RETRIES
+        # RequestsClient хранит сессию в каждом потоке, поэтому соединения переиспользуются
+        requests_client = getattr(stripe, 'RequestsClient', None) or stripe.http_client.RequestsClient
+        stripe.default_http_client = requests_client(timeout=settings.STRIPE_REQUEST_TIMEOUT)
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = ThreadPoolExecutor(max_workers=settings.STRIPE_MAX_WORKERS, thread_name_prefix='stripe')
+        # Ограничиваем число ожидающих вызовов, чтобы при деградации Stripe не копить очередь
+        _slots = threading.BoundedSemaphore(settings.STRIPE_MAX_WORKERS + settings.STRIPE_MAX_QUEUED)
+
+
+def _get_executor():
+    if _executor is None:
+        configure()
+    return _executor
+
+
+def create_payment_intent(amount, currency, idempotency_key, metadata=None):
+    """
+    Синхронно создает PaymentIntent в Stripe.
+
+    Args:
+        amount (int): Сумма в минимальных единицах валюты (центах).
+        currency (str): Валюта, например ``usd``.
+        idempotency_key (str): Ключ идемпотентности: повтор с тем же ключом вернет тот же объект.
+        metadata (dict | None): Метаданные платежа.
+
+    Returns:
+        stripe.PaymentIntent: Созданный объект.
+
+    """
+    _get_executor()
+    return stripe.PaymentIntent.create(
+        amount=amount,
+        currency=currency,
+        metadata=metadata or {},
+        idempotency_key=idempotency_key,
+    )
+
+
+async def acreate_payment_intent(amount, currency, idempotency_key, metadata=None):
+    """
+    Асинхронно создает PaymentIntent, выполняя вызов в ограниченном пуле потоков.
+
+    Args:
+        amount (int): Сумма в центах.
+        currency (str): Валюта.
+        idempotency_key (str): Ключ идемпотентности.
+        metadata (dict | None): Метаданные платежа.
+
+    Returns:
+        stripe.PaymentIntent: Созданный объект.
+
+    Raises:
+        StripeOverloaded: Если превышено число одновременных вызовов.
+        asyncio.TimeoutError: Если Stripe не ответил за STRIPE_TIMEOUT секунд.
+
+    """
+    executor = _get_executor()
+    slots = _slots
+    if not slots.acquire(blocking=False):
+        raise StripeOverloaded('Слишком много одновременных запросов к Stripe.')
+    try:
+        future = executor.submit(partial(create_payment_intent, amount, currency, idempotency_key, metadata))
+    except BaseException:
+        slots.release()
+        raise
+    # Слот освобождается, только когда поток действительно завершил вызов (в том числе после таймаута)
+    future.add_done_callback(lambda _: slots.release())
+    return await asyncio.wait_for(asyncio.wrap_future(future), timeout=settings.STRIPE_TIMEOUT)
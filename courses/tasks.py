@@ -0,0 +1,137 @@
+import datetime
+import logging
+import time
+from decimal import Decimal
+
+from celery import shared_task
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Course, DailyRevenue, Lesson, Payment, StripeEvent
+
+logger = logging.getLogger(__name__)
+
+# Типы событий Stripe, по которым создаются платежи
+PAYMENT_EVENT_TYPES = ('payment_intent.succeeded',)
+INGEST_BATCH_SIZE = 1000
+
+
+def build_payment(event, content_types):
+    """
+    Строит несохраненный платеж по событию Stripe.
+
+    Оплаченный объект и пользователь берутся из metadata PaymentIntent
+    (``user_id`` и ``course_id`` или ``lesson_id``).
+
+    Args:
+        event (StripeEvent): Событие.
+        content_types (dict): Типы содержимого курса и урока.
+
+    Returns:
+        tuple[Payment | None, str]: Платеж или None и причина отказа.
+
+    """
+    intent = event.payload.get('data', {}).get('object', {})
+    metadata = intent.get('metadata') or {}
+    if metadata.get('lesson_id'):
+        content_type, object_id = content_types['lesson'], metadata['lesson_id']
+    elif metadata.get('course_id'):
+        content_type, object_id = content_types['course'], metadata['course_id']
+    else:
+        return None, 'В metadata нет course_id или lesson_id.'
+    if not metadata.get('user_id'):
+        return None, 'В metadata нет user_id.'
+    try:
+        payment = Payment(
+            user_id=int(metadata['user_id']),
+            date_paid=datetime.datetime.fromtimestamp(int(intent['created']), tz=datetime.timezone.utc),
+            content_type=content_type,
+            object_id=int(object_id),
+            amount=Decimal(int(intent.get('amount_received') or intent['amount'])) / 100,
+            payment_method='stripe',
+        )
+    except (KeyError, TypeError, ValueError) as exc:
+        return None, f'Некорректные данные события: {exc}'[:255]
+    return payment, ''
+
+
+@shared_task
+def ingest_stripe_events(batch_size=INGEST_BATCH_SIZE, max_batches=100):
+    """
+    Создает платежи по накопленным событиям Stripe пачками.
+
+    Каждая пачка обрабатывается в отдельной транзакции: события блокируются через
+    SELECT ... FOR UPDATE SKIP LOCKED (параллельные обработчики не пересекаются),
+    платежи создаются одним bulk_create, дневные сводки обновляются агрегированно,
+    а события помечаются обработанными.
+
+    Args:
+        batch_size (int): Количество событий в пачке.
+        max_batches (int): Ограничение числа пачек за один запуск.
+
+    Returns:
+        dict: Количество обработанных событий и созданных платежей.
+    """
+    started_at = time.monotonic()
+    content_types = {
+        'course': ContentType.objects.get_for_model(Course),
+        'lesson': ContentType.objects.get_for_model(Lesson),
+    }
+    processed = created = 0
+    for _ in range(max_batches):
+        with transaction.atomic():
+            events = list(
+                StripeEvent.objects.filter(processed_at__isnull=True)
+                .order_by('id')
+                .select_for_update(skip_locked=True)[:batch_size]
+            )
+            if not events:
+                break
+
+            payments = []
+            event_pks = []
+            errors = {}
+            for event in events:
+                payment, error = build_payment(event, content_types)
+                if payment is None:
+                    errors[event.pk] = error
+                else:
+                    payments.append(payment)
+                    event_pks.append(event.pk)
+
+            # Платежи несуществующих пользователей не создаем, чтобы не нарушить внешний ключ
+            user_ids = {payment.user_id for payment in payments}
+            existing_users = set(
+                get_user_model().objects.filter(pk__in=user_ids).values_list('pk', flat=True)
+            )
+            for event_pk, payment in zip(event_pks, payments):
+                if payment.user_id not in existing_users:
+                    errors[event_pk] = f'Пользователь {payment.user_id} не найден.'
+            payments = [payment for event_pk, payment in zip(event_pks, payments) if event_pk not in errors]
+
+            Payment.objects.resolve_paid_items(payments)
+            Payment.objects.bulk_create(payments, batch_size=batch_size)
+            DailyRevenue.objects.record_payments(payments)
+
+            now = timezone.now()
+            StripeEvent.objects.filter(pk__in=[event.pk for event in events]).exclude(
+                pk__in=list(errors),
+            ).update(processed_at=now)
+            for pk, error in errors.items():
+                StripeEvent.objects.filter(pk=pk).update(processed_at=now, error=error)
+
+        processed += len(events)
+        created += len(payments)
+
+    elapsed = time.monotonic() - started_at
+    summary = {
+        'processed': processed,
+        'created': created,
+        'seconds': round(elapsed, 3),
+        'events_per_second': round(processed / elapsed, 1) if elapsed else 0,
+    }
+    if processed:
+        logger.info('Обработка событий Stripe: %s', summary)
+    return summary
@@ -1,3 +1,854 @@
-from django.test import TestCase
+import base64
+import datetime
+import hashlib
+import hmac
+import json
+import time
+import unittest
+from unittest import mock
+from decimal import Decimal
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from benchmarks.fake_stripe import FakeStripeServer
+from myproject.parsers import MessagePackParser
+from myproject.renderers import MessagePackRenderer, ORJSONRenderer, msgpack
+from myproject.serialization import ValuesRepresentation
+from . import stripe_gateway
+from .cache import get_version
+from users_app.models import UserProfile
+from .models import Course, CourseManager, DailyRevenue, Lesson, Payment, StripeEvent, Subscription
+from .serializers import LessonBulkSerializer, LessonSerializer, PaymentSerializer
+from .views import LessonViewSet, PaymentListView
+from .tasks import ingest_stripe_events
+
+YOUTUBE_MATERIALS = 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'
+
+
+class LessonCountTestCase(TestCase):
+    """Тесты денормализованного счетчика уроков курса."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username='owner', email='owner@example.com',
+                                                         password='password')
+        self.course = Course.objects.create(title='Курс', description='Описание', owner=self.user)
+        self.other_course = Course.objects.create(title='Другой курс', description='Описание', owner=self.user)
+
+    def create_lesson(self, course, title='Урок'):
+        return Lesson.objects.create(title=title, description='Описание', video_links=YOUTUBE_MATERIALS,
+                                     materials=YOUTUBE_MATERIALS, owner=self.user, course=course)
+
+    def assertLessonCounts(self):
+        for course in Course.objects.all():
+            self.assertEqual(course.lesson_count, course.lesson_set.count())
+
+    def test_create_move_and_delete(self):
+        lesson = self.create_lesson(self.course)
+        self.create_lesson(self.course)
+        self.assertLessonCounts()
+
+        lesson = Lesson.objects.get(pk=lesson.pk)
+        lesson.course = self.other_course
+        lesson.save()
+        self.assertLessonCounts()
+
+        lesson.delete()
+        self.assertLessonCounts()
+
+    def test_bulk_operations(self):
+        Lesson.objects.bulk_create([
+            Lesson(title=f'Урок {i}', description='', video_links=YOUTUBE_MATERIALS,
+                   materials=YOUTUBE_MATERIALS, owner=self.user, course=self.course)
+            for i in range(5)
+        ])
+        self.assertLessonCounts()
+
+        Lesson.objects.filter(title__in=['Урок 0', 'Урок 1']).update(course=self.other_course)
+        self.assertLessonCounts()
+
+        Lesson.objects.filter(course=self.course).delete()
+        self.assertLessonCounts()
+
+    def test_refresh_touches_only_drifted_courses(self):
+        self.create_lesson(self.course)
+        # Время изменения в прошлом: Now() в SQLite хранит только миллисекунды
+        Course.objects.filter(pk=self.other_course.pk).update(
+            lesson_count=5, updated_at=timezone.now() - datetime.timedelta(days=1),
+        )
+        before = dict(Course.objects.values_list('pk', 'updated_at'))
+
+        self.assertEqual(Course.objects.refresh_lesson_counts(), 1)
+        self.assertEqual(Course.objects.refresh_subscriber_counts(), 0)
+        self.assertLessonCounts()
+        after = dict(Course.objects.values_list('pk', 'updated_at'))
+        self.assertEqual(after[self.course.pk], before[self.course.pk])
+        self.assertGreater(after[self.other_course.pk], before[self.other_course.pk])
+
+    def test_course_list_query_count_is_constant(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for i in range(20):
+            course = Course.objects.create(title=f'Курс {i}', description='', owner=self.user)
+            self.create_lesson(course)
+
+        # Агрегат для ETag/Last-Modified (conditional_response) и сам список курсов
+        with self.assertNumQueries(2):
+            response = client.get('/courses/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(item['num_lessons'] == 1 for item in response.data if item['title'].startswith('Курс ')))
+
+        # Повторный условный запрос обходится одним агрегатом, без выборки списка
+        with self.assertNumQueries(1):
+            response = client.get('/courses/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(COURSES_LESSON_COUNT_FROM_ANNOTATION=True)
+    def test_course_list_counts_lessons_by_annotation(self):
+        self.create_lesson(self.course)
+        self.create_lesson(self.course)
+        Course.objects.filter(pk=self.course.pk).update(lesson_count=0)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        lessons = {item['id']: item['num_lessons'] for item in client.get('/courses/').data}
+        self.assertEqual(lessons, {self.course.pk: 2, self.other_course.pk: 0})
+
+
+class CourseResponseCacheTestCase(TestCase):
+    """Тесты инвалидации кеша ответов курсов массовыми операциями."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username='owner', email='owner@example.com')
+        self.course = Course.objects.create(title='Курс', description='Описание', owner=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertFresh(self, titles):
+        response = self.client.get('/courses/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual([item['title'] for item in response.data], titles)
+        self.assertEqual(self.client.get('/courses/')['X-Cache'], 'HIT')
+
+    def test_queryset_operations_invalidate_list(self):
+        # Время изменения в прошлом: Now() в SQLite хранит только миллисекунды
+        updated_at = timezone.now() - datetime.timedelta(days=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Course.objects.filter(pk=self.course.pk).update(updated_at=updated_at)
+        self.assertFresh(['Курс'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Course.objects.filter(pk=self.course.pk).update(title='Обновленный курс')
+        self.assertFresh(['Обновленный курс'])
+        self.assertGreater(Course.objects.get(pk=self.course.pk).updated_at, updated_at)
+
+        self.course.title = 'Курс пачкой'
+        with self.captureOnCommitCallbacks(execute=True):
+            Course.objects.bulk_update([self.course], ['title'])
+        self.assertFresh(['Курс пачкой'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Course.objects.filter(pk=self.course.pk).delete()
+        self.assertFresh([])
+
+    def test_version_is_bumped_after_commit(self):
+        version = get_version('courses.course')
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                Course.objects.filter(pk=self.course.pk).update(title='Обновленный курс')
+                self.assertEqual(get_version('courses.course'), version)
+            # Внешняя транзакция теста еще не зафиксирована
+            self.assertEqual(get_version('courses.course'), version)
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertEqual(get_version('courses.course'), version + 1)
+
+
+class ConditionalResponseTestCase(TestCase):
+    """Тесты условных GET-запросов курсов."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username='owner', email='owner@example.com')
+        self.course = Course.objects.create(title='Курс', description='Описание', owner=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_detail_not_modified(self):
+        url = f'/courses/{self.course.pk}/'
+        response = self.client.get(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+        Course.objects.filter(pk=self.course.pk).update(
+            title='Обновленный курс', updated_at=timezone.now() + datetime.timedelta(days=1),
+        )
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 200)
+
+    def test_list_has_no_last_modified(self):
+        response = self.client.get('/courses/')
+        self.assertNotIn('Last-Modified', response)
+        since = timezone.now() + datetime.timedelta(days=1)
+        response = self.client.get('/courses/', HTTP_IF_MODIFIED_SINCE=since.strftime('%a, %d %b %Y %H:%M:%S GMT'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_changes_after_create_and_delete(self):
+        etag = self.client.get('/courses/')['ETag']
+        other = Course.objects.create(title='Другой курс', description='Описание', owner=self.user)
+        response = self.client.get('/courses/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response['ETag']
+        other.delete()
+        response = self.client.get('/courses/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/courses/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+
+class LessonBulkTestCase(TestCase):
+    """Тесты пакетного создания и обновления уроков."""
+
+    url = '/lessons/bulk/'
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='author', email='author@example.com')
+        self.course = Course.objects.create(title='Курс', description='Описание', owner=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def items(self, count):
+        return [{'title': f'Урок {i}', 'description': 'Описание', 'video_links': YOUTUBE_MATERIALS,
+                 'materials': YOUTUBE_MATERIALS, 'course': self.course.pk} for i in range(count)]
+
+    def count_queries(self, method, data):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(self.url, data, format='json')
+        self.assertIn(response.status_code, (200, 201), response.data)
+        return len(queries)
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        self.assertEqual(self.count_queries('post', self.items(3)), self.count_queries('post', self.items(30)))
+        self.assertEqual(Course.objects.get(pk=self.course.pk).lesson_count, 33)
+
+        lessons = list(Lesson.objects.order_by('pk').values_list('pk', flat=True))
+        self.assertEqual(self.count_queries('patch', [{'id': pk, 'title': 'Новое'} for pk in lessons[:3]]),
+                         self.count_queries('patch', [{'id': pk, 'title': 'Новое'} for pk in lessons[3:]]))
+        self.assertFalse(Lesson.objects.exclude(title='Новое').exists())
+
+    def test_errors_are_reported_per_item(self):
+        items = self.items(3)
+        items[1]['materials'] = 'https://evil.com/'
+        del items[2]['title']
+        response = self.client.post(self.url, items, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertEqual(set(response.data[1]), {'materials'})
+        self.assertEqual(set(response.data[2]), {'title'})
+        self.assertFalse(Lesson.objects.exists())
+
+    def test_rejects_too_many_items_and_duplicate_ids(self):
+        response = self.client.post(self.url, [{}] * (LessonViewSet.bulk_max_items + 1), format='json')
+        self.assertEqual(response.status_code, 400)
+
+        lesson = self.client.post(self.url, self.items(1), format='json').data[0]
+        response = self.client.patch(self.url, [{'id': lesson['id'], 'title': 'Первое'},
+                                                {'id': lesson['id'], 'title': 'Второе'}, {'id': 0}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertEqual(set(response.data[1]), {'id'})
+        self.assertEqual(set(response.data[2]), {'id'})
+
+        response = self.client.patch(self.url, [{'id': True, 'title': 'Логическое'}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data[0]), {'id'})
+        self.assertEqual(Lesson.objects.get().title, 'Урок 0')
+
+    def test_failed_write_rolls_back_all_batches(self):
+        with mock.patch.object(LessonBulkSerializer, 'batch_size', 2), \
+                mock.patch.object(CourseManager, 'refresh_lesson_counts', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.client.post(self.url, self.items(5), format='json')
+        self.assertFalse(Lesson.objects.exists())
+
+
+class CourseLessonsTestCase(TestCase):
+    """Тесты упорядоченного списка уроков курса."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='author', email='author@example.com')
+        self.course = Course.objects.create(title='Курс', description='Описание', owner=self.user)
+        self.lessons = [
+            Lesson.objects.create(title=f'Урок {i}', description='Описание', video_links=YOUTUBE_MATERIALS,
+                                  materials=YOUTUBE_MATERIALS, owner=self.user, course=self.course)
+            for i in range(5)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/courses/{self.course.pk}/lessons/'
+
+    def test_new_lessons_are_appended(self):
+        self.assertEqual([lesson.position for lesson in self.lessons], [1, 2, 3, 4, 5])
+        created = Lesson.objects.bulk_create([
+            Lesson(title='Новый', description='', video_links=YOUTUBE_MATERIALS, materials=YOUTUBE_MATERIALS,
+                   owner=self.user, course=self.course),
+        ])
+        self.assertEqual(created[0].position, 6)
+
+    def test_reorder_and_paginate(self):
+        new_order = [lesson.pk for lesson in reversed(self.lessons)]
+        response = self.client.put(self.url, new_order, format='json')
+        self.assertEqual(response.status_code, 204)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'page_size': 3})
+        self.assertEqual([lesson['id'] for lesson in response.data['results']], new_order[:3])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([lesson['id'] for lesson in response.data['results']], new_order[3:])
+
+    def test_reorder_rejects_foreign_lessons(self):
+        other = Course.objects.create(title='Другой', description='', owner=self.user)
+        foreign = Lesson.objects.create(title='Чужой', description='', video_links=YOUTUBE_MATERIALS,
+                                        materials=YOUTUBE_MATERIALS, owner=self.user, course=other)
+        response = self.client.put(self.url, [foreign.pk, self.lessons[0].pk], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Lesson.objects.get(pk=self.lessons[0].pk).position, 1)
+
+    def test_reorder_rejects_booleans(self):
+        # true/false из JSON не должны превращаться в id 1 и 0
+        response = self.client.put(self.url, [True, self.lessons[1].pk], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'non_field_errors': ['Ожидается список уникальных id уроков.']})
+
+    def test_missing_course(self):
+        self.assertEqual(self.client.get('/courses/0/lessons/').status_code, 404)
+
+
+class SparseFieldsetTestCase(TestCase):
+    """Тесты параметров ?fields= и ?exclude=."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='reader', email='reader@example.com')
+        self.course = Course.objects.create(title='Курс', description='Описание', owner=self.user)
+        Lesson.objects.create(title='Урок', description='Описание', video_links=YOUTUBE_MATERIALS,
+                              materials=YOUTUBE_MATERIALS, owner=self.user, course=self.course)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_fields_trim_output_and_defer_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/lessons/', {'fields': 'id,title'})
+        self.assertEqual(list(response.data[0]), ['id', 'title'])
+        self.assertNotIn('materials', ' '.join(query['sql'] for query in queries.captured_queries))
+
+    def test_exclude_keeps_computed_fields(self):
+        response = self.client.get('/courses/', {'exclude': 'description,preview_image'})
+        course = response.data[0]
+        self.assertNotIn('description', course)
+        self.assertEqual(course['num_lessons'], 1)
+
+
+class FastSerializationTestCase(TestCase):
+    """Быстрый путь values() + orjson должен давать те же байты, что ModelSerializer + JSONRenderer."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='автор', email='author@example.com')
+        course = Course.objects.create(title='Курс', description='Описание', owner=self.user)
+        Lesson.objects.create(title='Урок "1"\u2028', description='Описание\nс переводом строки',
+                              video_links=YOUTUBE_MATERIALS, materials=YOUTUBE_MATERIALS, owner=self.user,
+                              course=course, preview_image='lesson_previews/урок.png')
+        Lesson.objects.create(title='Без курса', description='', video_links=YOUTUBE_MATERIALS,
+                              materials=YOUTUBE_MATERIALS, owner=self.user)
+        Payment.objects.create(user=self.user, date_paid=timezone.now(), amount='10.5', payment_method='cash',
+                               content_type=ContentType.objects.get_for_model(Course), object_id=course.pk)
+        self.request = Request(APIRequestFactory().get('/lessons/'))
+
+    def assertSameBytes(self, serializer_class, queryset):
+        context = {'request': self.request}
+        expected = JSONRenderer().render(serializer_class(queryset, many=True, context=context).data)
+        fast = ValuesRepresentation(serializer_class(context=context))
+        self.assertTrue(fast.supported)
+        self.assertEqual(ORJSONRenderer().render(fast.represent(fast.values(queryset))), expected)
+
+    def test_lessons(self):
+        self.assertSameBytes(LessonSerializer, Lesson.objects.order_by('pk'))
+
+    def test_payments(self):
+        self.assertSameBytes(PaymentSerializer, Payment.objects.order_by('pk'))
+
+    def test_opt_in_views_return_same_bytes(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for view, url in ((LessonViewSet, '/lessons/'), (PaymentListView, '/payments/')):
+            with self.subTest(url=url):
+                cache.clear()
+                expected = client.get(url).content
+                cache.clear()
+                with mock.patch.object(view, 'fast_list', True):
+                    self.assertEqual(client.get(url).content, expected)
+
+
+class PaymentCursorTestCase(TestCase):
+    """Тесты keyset-пагинации платежей."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='buyer', email='buyer@example.com')
+        course = Course.objects.create(title='Курс', description='Описание', owner=user)
+        for day in range(1, 6):
+            Payment.objects.create(user=user, date_paid=datetime.datetime(2026, 1, day, tzinfo=datetime.timezone.utc),
+                                   amount=10, payment_method='cash',
+                                   content_type=ContentType.objects.get_for_model(Course), object_id=course.pk)
+
+    @staticmethod
+    def make_cursor(payload):
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+    def test_walks_pages_forward_and_back(self):
+        first = self.client.get('/payments/', {'page_size': 2}).json()
+        second = self.client.get(first['next']).json()
+        self.assertEqual([item['date_paid'][:10] for item in second['results']], ['2026-01-03', '2026-01-02'])
+        self.assertEqual(self.client.get(second['previous']).json()['results'], first['results'])
+
+    def test_cursor_bounds_the_index_range(self):
+        first = self.client.get('/payments/', {'page_size': 2}).json()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(first['next'])
+        sql = next(query['sql'] for query in queries.captured_queries if 'courses_payment' in query['sql'])
+        # Нестрогая граница вне OR, чтобы индекс (date_paid, id) читался с позиции курсора
+        self.assertRegex(sql, r'WHERE \("courses_payment"\."date_paid" <= .+? AND \("courses_payment"\."date_paid" < ')
+
+    def test_tampered_cursor_is_not_found(self):
+        for payload in ({'v': 'foo', 'i': 1, 'r': False}, {'v': None, 'i': 1, 'r': False},
+                        {'v': '2026-01-03T00:00:00+00:00', 'i': 'x', 'r': False},
+                        {'v': '2026-01-03T00:00:00+00:00', 'i': 10 ** 30, 'r': False},
+                        {'v': ['2026-01-03'], 'i': 1, 'r': False}, ['v', 'i'], {'v': '2026-01-03'}):
+            with self.subTest(payload=payload):
+                response = self.client.get('/payments/', {'cursor': self.make_cursor(payload)})
+                self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.client.get('/payments/', {'cursor': '%%%'}).status_code, 404)
+
+
+@unittest.skipIf(msgpack is None, 'msgpack не установлен')
+class MessagePackTestCase(TestCase):
+    """Тесты согласования формата MessagePack."""
+
+    def test_round_trip_keeps_decimal_and_datetime(self):
+        data = {'amount': Decimal('10.50'), 'date_paid': timezone.now(), 'day': datetime.date(2026, 1, 2)}
+        content = MessagePackRenderer().render(data)
+        self.assertEqual(MessagePackParser().parse(BytesIO(content)), data)
+
+    def test_accept_header_selects_msgpack(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(username='service', email='service@example.com')
+        Course.objects.create(title='Курс', description='Описание', owner=user)
+        client = APIClient()
+        client.force_authenticate(user)
+        json_response = client.get('/courses/')
+        response = client.get('/courses/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), json.loads(json_response.content))
+
+
+class SubscriptionTestCase(TestCase):
+    """Тесты массовой подписки и отписки."""
+
+    def setUp(self):
+        self.owner = get_user_model().objects.create_user(username='teacher', email='teacher@example.com')
+        self.course = Course.objects.create(title='Курс', description='Описание', owner=self.owner)
+        self.profiles = [
+            UserProfile.objects.create(user=get_user_model().objects.create_user(
+                username=f'student{i}', email=f'student{i}@example.com',
+            )).pk
+            for i in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.url = f'/courses/{self.course.pk}/subscriptions/'
+
+    def test_subscribe_and_unsubscribe(self):
+        response = self.client.post(self.url, {'users': self.profiles + [self.profiles[0], 0]}, format='json')
+        self.assertEqual(response.data, {'subscribed': 3, 'subscriber_count': 3})
+        # Повторная подписка не создает дубликатов
+        response = self.client.post(self.url, {'users': self.profiles[:2]}, format='json')
+        self.assertEqual(response.data, {'subscribed': 0, 'subscriber_count': 3})
+        self.assertEqual(Subscription.objects.filter(course=self.course).count(), 3)
+
+        response = self.client.delete(self.url, {'users': self.profiles[:2]}, format='json')
+        self.assertEqual(response.data, {'unsubscribed': 2, 'subscriber_count': 1})
+        self.assertSubscriberCounts()
+
+    def test_counter_follows_single_and_cascade_changes(self):
+        other_course = Course.objects.create(title='Другой курс', description='Описание', owner=self.owner)
+        subscription = Subscription.objects.create(user_id=self.profiles[0], course=self.course)
+        Subscription.objects.create(user_id=self.profiles[1], course=self.course)
+        self.assertSubscriberCounts()
+
+        subscription = Subscription.objects.get(pk=subscription.pk)
+        subscription.course = other_course
+        subscription.save()
+        self.assertSubscriberCounts()
+
+        subscription.delete()
+        self.assertSubscriberCounts()
+
+        # Удаление профиля каскадно удаляет его подписки
+        UserProfile.objects.filter(pk=self.profiles[1]).delete()
+        self.assertSubscriberCounts()
+
+    def assertSubscriberCounts(self):
+        for course in Course.objects.all():
+            self.assertEqual(course.subscriber_count, course.subscription_set.count())
+
+    def test_only_owner_or_moderator_can_enroll(self):
+        other = get_user_model().objects.create_user(username='stranger', email='stranger@example.com')
+        self.client.force_authenticate(other)
+        response = self.client.post(self.url, {'users': self.profiles}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Subscription.objects.exists())
+
+
+class PaymentIntentTestCase(TestCase):
+    """Тесты создания PaymentIntent через локальный имитатор Stripe."""
+
+    def setUp(self):
+        self.server = FakeStripeServer().start()
+        self.addCleanup(self.server.stop)
+        settings_override = override_settings(STRIPE_API_BASE=self.server.url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        stripe_gateway.configure()
+        self.addCleanup(stripe_gateway.configure)
+
+    def test_create_payment_intent_is_idempotent(self):
+        headers = {'HTTP_IDEMPOTENCY_KEY': 'checkout-1'}
+        first = self.client.post('/payments/intent/', {'amount': 1000, 'currency': 'usd'},
+                                 content_type='application/json', **headers)
+        second = self.client.post('/payments/intent/', {'amount': 1000, 'currency': 'usd'},
+                                  content_type='application/json', **headers)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json(), second.json())
+        self.assertTrue(first.json()['client_secret'].startswith('pi_fake_'))
+
+    def test_rejects_invalid_amount(self):
+        response = self.client.post('/payments/intent/', {'amount': 'много', 'currency': 'usd'},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_stripe_error_is_bad_gateway(self):
+        # Имитатор отвечает invalid_request_error на неизвестный путь
+        with override_settings(STRIPE_API_BASE=f'{self.server.url}/unknown'):
+            stripe_gateway.configure()
+            response = self.client.post('/payments/intent/', {'amount': 1000, 'currency': 'usd'},
+                                        content_type='application/json')
+        self.assertEqual(response.status_code, 502)
+        self.assertIn('Unknown path', response.json()['error'])
+
+
+class RequestMetricsTestCase(TestCase):
+    """Тесты middleware метрик запросов (Server-Timing)."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username='reader', email='reader@example.com')
+        Course.objects.create(title='Курс', description='Описание', owner=self.user)
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    def assertTimedQueries(self, response):
+        self.assertEqual(response.status_code, 200)
+        server_timing = response['Server-Timing']
+        self.assertRegex(server_timing, r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertIn('render;dur=', server_timing)
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=1.0)
+    def test_sync_request(self):
+        with self.assertLogs('myproject.metrics') as logs:
+            self.assertNotIn('Server-Timing', self.client.get('/courses/', headers=self.headers))
+            self.user.is_staff = True
+            self.user.save()
+            self.assertTimedQueries(self.client.get('/courses/', headers=self.headers))
+        self.assertEqual([json.loads(record.getMessage())['route'] for record in logs.records],
+                         ['course-list', 'course-list'])
+
+    def test_not_sampled_by_default_in_tests(self):
+        with self.assertNoLogs('myproject.metrics'), override_settings(DEBUG=True):
+            response = self.client.get('/courses/', headers=self.headers)
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=1.0, DEBUG=True)
+    async def test_async_request_is_not_adapted_to_sync(self):
+        # При DEBUG Django пишет в лог каждое синхронное middleware, обернутое для ASGI.
+        # Запросы к базе выполняются в потоке sync_to_async и все равно учитываются.
+        with self.assertNoLogs('django.request', 'DEBUG'), self.assertLogs('myproject.metrics'):
+            response = await self.async_client.get('/courses/', headers=self.headers)
+        self.assertTimedQueries(response)
+
+
+@override_settings(STRIPE_WEBHOOK_SECRET='whsec_test')
+class StripeWebhookTestCase(TestCase):
+    """Тесты проверки подписи вебхуков Stripe."""
+
+    payload = json.dumps({'id': 'evt_1', 'object': 'event', 'type': 'payment_intent.succeeded',
+                          'data': {'object': {'amount': 1500, 'metadata': {}}}})
+
+    def post(self, signature):
+        return self.client.post('/payments/webhook/', self.payload, content_type='application/json',
+                                headers={'Stripe-Signature': signature})
+
+    def test_signed_event_is_queued(self):
+        timestamp = int(time.time())
+        digest = hmac.new(b'whsec_test', f'{timestamp}.{self.payload}'.encode(), hashlib.sha256).hexdigest()
+        self.assertEqual(self.post(f't={timestamp},v1={digest}').status_code, 200)
+        self.assertTrue(StripeEvent.objects.filter(event_id='evt_1').exists())
+
+    def test_bad_signature_is_rejected(self):
+        self.assertEqual(self.post(f't={int(time.time())},v1=deadbeef').status_code, 400)
+        self.assertFalse(StripeEvent.objects.exists())
+
+
+class StripeEventIngestionTestCase(TestCase):
+    """Тесты пакетного создания платежей по событиям Stripe."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='buyer', email='buyer@example.com')
+        self.course = Course.objects.create(title='Курс', description='Описание', owner=self.user)
+
+    def make_event(self, number, metadata):
+        return StripeEvent(event_id=f'evt_{number}', event_type='payment_intent.succeeded', payload={
+            'id': f'evt_{number}',
+            'type': 'payment_intent.succeeded',
+            'data': {'object': {'amount': 1500, 'created': 1700000000, 'metadata': metadata}},
+        })
+
+    def test_ingests_batches_and_skips_invalid_events(self):
+        metadata = {'user_id': str(self.user.pk), 'course_id': str(self.course.pk)}
+        StripeEvent.objects.bulk_create([self.make_event(i, metadata) for i in range(5)])
+        # Повторная доставка того же события отбрасывается уникальным индексом
+        StripeEvent.objects.bulk_create([self.make_event(0, metadata)], ignore_conflicts=True)
+        StripeEvent.objects.bulk_create([self.make_event(99, {'user_id': str(self.user.pk)})])
+
+        result = ingest_stripe_events(batch_size=2)
+
+        self.assertEqual(result['processed'], 6)
+        self.assertEqual(result['created'], 5)
+        self.assertEqual(Payment.objects.filter(course=self.course).count(), 5)
+        self.assertFalse(StripeEvent.objects.filter(processed_at__isnull=True).exists())
+        self.assertNotEqual(StripeEvent.objects.get(event_id='evt_99').error, '')
+        revenue = DailyRevenue.objects.get(course=self.course, payment_method='stripe')
+        self.assertEqual((revenue.total_amount, revenue.payments_count), (75, 5))
+
+
+class RevenueSummaryTestCase(TestCase):
+    """Тесты отчета о выручке."""
+
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(username='admin', email='admin@example.com')
+        course = Course.objects.create(title='Курс', description='Описание', owner=self.admin)
+        for amount in ('2.25', '3.25'):
+            Payment.objects.create(user=self.admin, date_paid=datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc),
+                                   amount=amount, payment_method='cash',
+                                   content_type=ContentType.objects.get_for_model(Course), object_id=course.pk)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_grouped_amounts_match_row_format(self):
+        rows = self.client.get('/revenue/').json()
+        grouped = self.client.get('/revenue/', {'group_by': 'day'}).json()
+        self.assertEqual([row['total_amount'] for row in rows], ['5.50'])
+        self.assertEqual(grouped, [{'day': '2026-01-01', 'total_amount': '5.50', 'payments_count': 2}])
+
+
+class DailyRevenueTestCase(TestCase):
+    """Тесты дневных сводок выручки."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='buyer', email='buyer@example.com')
+        self.course = Course.objects.create(title='Курс', description='Описание', owner=self.user)
+        self.other_course = Course.objects.create(title='Другой курс', description='Описание', owner=self.user)
+
+    def pay(self, course, day, amount, payment_method='cash'):
+        return Payment.objects.create(
+            user=self.user, date_paid=datetime.datetime(2026, 1, day, 12, tzinfo=datetime.timezone.utc),
+            amount=amount, payment_method=payment_method,
+            content_type=ContentType.objects.get_for_model(Course), object_id=course.pk,
+        )
+
+    def create_payments(self):
+        self.pay(self.course, 1, '10.00')
+        self.pay(self.course, 1, '2.50')
+        self.pay(self.course, 1, '7.00', payment_method='stripe')
+        self.pay(self.other_course, 1, '1.00')
+        self.pay(self.course, 2, '4.00')
+
+    @staticmethod
+    def summary():
+        return {
+            (row.day, row.course_id, row.payment_method): (row.total_amount, row.payments_count)
+            for row in DailyRevenue.objects.all()
+        }
+
+    def expected_summary(self):
+        day_one, day_two = datetime.date(2026, 1, 1), datetime.date(2026, 1, 2)
+        return {
+            (day_one, self.course.pk, 'cash'): (Decimal('12.50'), 2),
+            (day_one, self.course.pk, 'stripe'): (Decimal('7.00'), 1),
+            (day_one, self.other_course.pk, 'cash'): (Decimal('1.00'), 1),
+            (day_two, self.course.pk, 'cash'): (Decimal('4.00'), 1),
+        }
+
+    def test_new_payments_update_day_rows(self):
+        self.create_payments()
+        self.assertEqual(self.summary(), self.expected_summary())
+
+    def test_rebuild_matches_payment_aggregate(self):
+        self.create_payments()
+        DailyRevenue.objects.update(total_amount=0, payments_count=0)
+        DailyRevenue.objects.filter(payment_method='stripe').delete()
+
+        self.assertEqual(DailyRevenue.objects.rebuild(datetime.date(2026, 1, 1), datetime.date(2026, 1, 2)), 4)
+        self.assertEqual(self.summary(), self.expected_summary())
+
+    def test_rebuild_command(self):
+        self.create_payments()
+        DailyRevenue.objects.all().delete()
+
+        out = StringIO()
+        call_command('rebuild_revenue', '--from', '2026-01-02', '--to', '2026-01-02', stdout=out)
+        self.assertIn('строк 1', out.getvalue())
+        self.assertEqual(self.summary(), {
+            key: value for key, value in self.expected_summary().items() if key[0] == datetime.date(2026, 1, 2)
+        })
+        with self.assertRaises(CommandError):
+            call_command('rebuild_revenue', '--from', '2026-01-02', '--to', '2026-01-01')
+
+
+class PaymentPaidItemTestCase(TestCase):
+    """Тесты ссылок платежа на оплаченный курс или урок и фильтрации по ним."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='buyer', email='buyer@example.com')
+        self.course = Course.objects.create(title='Курс', description='Описание', owner=self.user)
+        self.other_course = Course.objects.create(title='Другой курс', description='Описание', owner=self.user)
+        self.lesson = Lesson.objects.create(title='Урок', description='Описание', video_links=YOUTUBE_MATERIALS,
+                                            materials=YOUTUBE_MATERIALS, owner=self.user, course=self.course)
+        self.course_payment = self.create_payment(self.course)
+        self.lesson_payment = self.create_payment(self.lesson)
+        self.other_payment = self.create_payment(self.other_course)
+
+    def create_payment(self, item):
+        return Payment.objects.create(user=self.user, date_paid=timezone.now(), amount=10, payment_method='cash',
+                                      content_type=ContentType.objects.get_for_model(item), object_id=item.pk)
+
+    def test_paid_items_are_resolved_on_save(self):
+        self.assertEqual((self.course_payment.course_id, self.course_payment.lesson_id), (self.course.pk, None))
+        self.assertEqual((self.lesson_payment.course_id, self.lesson_payment.lesson_id),
+                         (self.course.pk, self.lesson.pk))
+
+    def test_filter_by_course_and_lesson_id(self):
+        def paid_ids(params):
+            return sorted(item['id'] for item in self.client.get('/payments/', params).json()['results'])
+
+        # Платеж за урок относится и к курсу урока
+        self.assertEqual(paid_ids({'course': self.course.pk}), [self.course_payment.pk, self.lesson_payment.pk])
+        self.assertEqual(paid_ids({'lesson': self.lesson.pk}), [self.lesson_payment.pk])
+        self.assertEqual(paid_ids({'course': self.other_course.pk}), [self.other_payment.pk])
+
+    def test_backfill_fills_null_links(self):
+        # Платеж за несуществующий курс (bulk_create не вызывает save) остается без ссылок
+        missing, = Payment.objects.bulk_create([Payment(
+            user=self.user, date_paid=timezone.now(), amount=10, payment_method='cash',
+            content_type=ContentType.objects.get_for_model(Course), object_id=self.other_course.pk + 100,
+        )])
+        Payment.objects.update(course=None, lesson=None)
+
+        out = StringIO()
+        call_command('backfill_payment_items', batch_size=2, stdout=out)
+        self.assertIn('Обновлено платежей: 3.', out.getvalue())
+        self.assertEqual(
+            dict(Payment.objects.values_list('pk', 'course_id')),
+            {self.course_payment.pk: self.course.pk, self.lesson_payment.pk: self.course.pk,
+             self.other_payment.pk: self.other_course.pk, missing.pk: None},
+        )
+        self.assertEqual(Payment.objects.get(pk=self.lesson_payment.pk).lesson_id, self.lesson.pk)
+
+
+class PaymentExportTestCase(TestCase):
+    """Тесты потоковой выгрузки платежей."""
+
+    def setUp(self):
+        self.admin = get_user_model().objects.create_user(username='admin', email='admin@example.com',
+                                                          is_staff=True)
+        self.course = Course.objects.create(title='Курс', description='Описание', owner=self.admin)
+        content_type = ContentType.objects.get_for_model(Course)
+        start = timezone.now()
+        for day in range(3):
+            Payment.objects.create(user=self.admin, date_paid=start - datetime.timedelta(days=day),
+                                   content_type=content_type, object_id=self.course.pk, amount=100 + day,
+                                   payment_method='stripe' if day else 'cash')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def read(self, response):
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export_honours_filters_and_ordering(self):
+        content = self.read(self.client.get('/payments/export/', {'payment_method': 'stripe',
+                                                                  'ordering': 'date_paid'}))
+        lines = content.strip().splitlines()
+        self.assertTrue(lines[0].startswith('id,user,date_paid'))
+        self.assertEqual([line.split(',')[5] for line in lines[1:]], ['102.00', '101.00'])
+
+    def test_ndjson_export(self):
+        content = self.read(self.client.get('/payments/export/', {'export_format': 'ndjson'}))
+        records = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([record['amount'] for record in records], ['100.00', '101.00', '102.00'])
+        self.assertEqual(records[0]['course'], self.course.pk)
+
+    def test_rejects_unknown_format(self):
+        response = self.client.get('/payments/export/', {'export_format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+
+class SearchTestCase(TestCase):
+    """Тесты полнотекстового поиска курсов и уроков."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='student', email='student@example.com')
+        self.course = Course.objects.create(title='Python для начинающих', description='Основы', owner=self.user)
+        Course.objects.create(title='Go', description='Конкурентность', owner=self.user)
+        self.in_title = Lesson.objects.create(title='Python', description='Введение', video_links=YOUTUBE_MATERIALS,
+                                              materials=YOUTUBE_MATERIALS, owner=self.user, course=self.course)
+        self.in_description = Lesson.objects.create(title='Переменные', description='Пишем на Python',
+                                                    video_links=YOUTUBE_MATERIALS, materials=YOUTUBE_MATERIALS,
+                                                    owner=self.user, course=self.course)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_lessons_ranked_by_field_weight(self):
+        response = self.client.get('/lessons/search/', {'q': 'python'})
+        self.assertEqual(response.status_code, 200)
+        ids = [lesson['id'] for lesson in response.data['results']]
+        self.assertEqual(ids, [self.in_title.pk, self.in_description.pk])
+
+    def test_search_follows_updates(self):
+        Lesson.objects.filter(pk=self.in_description.pk).update(description='Пишем на Go')
+        response = self.client.get('/lessons/search/', {'q': 'python'})
+        self.assertEqual([lesson['id'] for lesson in response.data['results']], [self.in_title.pk])
+
+    def test_course_search_requires_query(self):
+        response = self.client.get('/courses/search/', {'q': 'python'})
+        self.assertEqual([course['id'] for course in response.data['results']], [self.course.pk])
+        self.assertEqual(self.client.get('/courses/search/').status_code, 400)
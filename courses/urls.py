@@ -1,9 +1,18 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import  CourseViewSet, LessonViewSet
+from .views import (CacheStatsView, CourseViewSet, LessonViewSet, PaymentCreateView, PaymentExportView,
+                    PaymentListView, PaymentView, RevenueSummaryView, StripeWebhookView)
 # Создаем роутер для автоматического создания URL-маршрутов для ViewSet'ов
 router = DefaultRouter()
 router.register(r'courses', CourseViewSet)
 router.register(r'lessons', LessonViewSet)
 
 urlpatterns = [
+    path('payments/', PaymentListView.as_view(), name='payment-list'),
+    path('payments/export/', PaymentExportView.as_view(), name='payment-export'),
+    path('payments/intent/', PaymentCreateView.as_view(), name='payment-intent'),
+    path('payments/checkout/', PaymentView.as_view(), name='payment-checkout'),
+    path('payments/webhook/', StripeWebhookView.as_view(), name='stripe-webhook'),
+    path('revenue/', RevenueSummaryView.as_view(), name='revenue-summary'),
+    path('cache-stats/', CacheStatsView.as_view(), name='cache-stats'),
 ] + router.urls
\ No newline at end of file
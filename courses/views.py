@@ -1,44 +1,192 @@
+import asyncio
+import csv
+import datetime
+import json
+import uuid
+from decimal import Decimal
+
 import stripe as stripe
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from rest_framework import generics, viewsets, status
 from rest_framework.response import Response
-from .serializers import LessonSerializer, PaymentSerializer
+from .serializers import DailyRevenueSerializer, LessonSerializer, PaymentSerializer
 from rest_framework.filters import OrderingFilter
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from courses.serializers import CourseSerializer
 from rest_framework.decorators import action
-from .models import Lesson, Payment
+from rest_framework.exceptions import AuthenticationFailed
+from users_app.authentication import CachedJWTAuthentication
+from .models import DailyRevenue, DailyRevenueFilter, Lesson, Payment, PaymentFilter, StripeEvent, Subscription
 from courses.models import Course
+from .cache import cache_response, get_cache_stats
+from .conditional import conditional_response
+from . import stripe_gateway
+from .pagination import LessonPositionPagination, PaymentCursorPagination, SearchPagination
+from .search import search
+from myproject.fieldsets import SparseFieldsetViewMixin, defer_unrequested
+from myproject.middleware import timed_section
+from myproject.serialization import ValuesRepresentation
+from .tasks import PAYMENT_EVENT_TYPES
 from .permissions import IsModerator, IsOwnerOrReadOnly
 from django.views import View
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+from django.db import transaction
+from django.db.models import Sum
+
+
+def search_response(request, queryset, serializer_class):
+    """
+    Выполняет поиск по ``?q=`` и возвращает страницу сериализованных результатов.
+
+    Args:
+        request (Request): Текущий запрос.
+        queryset (QuerySet): Набор курсов или уроков, в котором ищем.
+        serializer_class (type): Сериализатор результатов.
+
+    Returns:
+        Response: Страница результатов или ошибка 400 без запроса.
 
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'q': ['Укажите поисковый запрос.']}, status=status.HTTP_400_BAD_REQUEST)
+    context = {'request': request}
+    queryset = defer_unrequested(search(queryset, query), serializer_class(context=context))
+    paginator = SearchPagination()
+    page = paginator.paginate_queryset(queryset, request)
+    with timed_section('ser'):
+        data = serializer_class(page, many=True, context=context).data
+    return paginator.get_paginated_response(data)
 
-class CourseViewSet(viewsets.ModelViewSet):
+
+class CourseViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """ViewSet для выполнения операций CRUD над курсами."""
 
-    queryset = Course.objects.all()
+    queryset = Course.objects.select_related('owner')
     serializer_class = CourseSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Резервный режим: считаем уроки аннотацией вместо денормализованного счетчика
+        if getattr(settings, 'COURSES_LESSON_COUNT_FROM_ANNOTATION', False):
+            queryset = queryset.with_lesson_count()
+        return queryset
+
     def get_permissions(self):
         # Разрешения для разных действий
         permission_classes = [IsAuthenticated]
         if self.action == "create":
             permission_classes = [IsAuthenticated, ~IsModerator]
-        elif self.action in ["update", "partial_update"]:
+        elif self.action in ["update", "partial_update", "reorder_lessons", "subscriptions", "unsubscribe"]:
             permission_classes = [IsAuthenticated, IsModerator | IsOwnerOrReadOnly]
         elif self.action in ["destroy", "retrieve"]:
             permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
         return [permission() for permission in permission_classes]
 
+    @conditional_response(Course)
+    @cache_response('courses.course')
+    def list(self, request, *args, **kwargs):
+        """Обрабатывает GET-запрос для вывода списка курсов (с кешированием ответа)."""
+        return super().list(request, *args, **kwargs)
+
+    @conditional_response(Course, detail=True)
+    @cache_response('courses.course', detail=True)
+    def retrieve(self, request, *args, **kwargs):
+        """Обрабатывает GET-запрос для получения курса (с кешированием ответа)."""
+        return super().retrieve(request, *args, **kwargs)
+
+    # Максимальное количество профилей в одном запросе подписки или отписки
+    subscriptions_max_items = 10000
+
+    @action(detail=True, methods=['post'])
+    def subscriptions(self, request, pk=None):
+        """
+        Подписывает профили пользователей на курс.
+
+        Тело запроса — ``{"users": [id профилей]}``. Уже подписанные и несуществующие профили
+        пропускаются; подписки создаются пачками через bulk_create(ignore_conflicts=True).
+        """
+        return self.change_subscriptions(request, pk, subscribe=True)
+
+    @subscriptions.mapping.delete
+    def unsubscribe(self, request, pk=None):
+        """Отписывает профили пользователей (``{"users": [...]}``) от курса одним DELETE-запросом."""
+        return self.change_subscriptions(request, pk, subscribe=False)
+
+    def change_subscriptions(self, request, pk, subscribe):
+        course = get_object_or_404(Course.objects.only('pk', 'owner'), pk=pk)
+        self.check_object_permissions(request, course)
+        profile_ids = request.data.get('users') if isinstance(request.data, dict) else None
+        if not isinstance(profile_ids, list) or not all(
+            isinstance(profile_id, int) and not isinstance(profile_id, bool) for profile_id in profile_ids
+        ):
+            return Response({'users': ['Ожидается список id профилей пользователей.']},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(profile_ids) > self.subscriptions_max_items:
+            return Response({'users': [f'Не более {self.subscriptions_max_items} профилей за запрос.']},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if subscribe:
+            result = {'subscribed': Subscription.objects.subscribe(course.pk, profile_ids)}
+        else:
+            result = {'unsubscribed': Subscription.objects.unsubscribe(course.pk, profile_ids)}
+        result['subscriber_count'] = Course.objects.filter(pk=course.pk).values_list(
+            'subscriber_count', flat=True,
+        ).get()
+        return Response(result)
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Полнотекстовый поиск курсов по ``?q=`` с сортировкой по релевантности."""
+        return search_response(request, self.get_queryset(), CourseSerializer)
+
     @action(detail=True, methods=['get'])
     def lessons(self, request, pk=None):
-        course = self.get_object()
-        lessons = Lesson.objects.filter(course=course)
-        serializer = LessonSerializer(lessons, many=True)
-        return Response(serializer.data)
+        """
+        Возвращает уроки курса по порядку (``?ordering=position|-position``) постранично.
+
+        Два запроса на страницу независимо от ее размера: проверка курса и выборка
+        страницы по индексу (course, position, id).
+        """
+        get_object_or_404(Course.objects.only('pk'), pk=pk)
+        context = {'request': request}
+        queryset = defer_unrequested(Lesson.objects.filter(course_id=pk).select_related('owner'),
+                                     LessonSerializer(context=context), keep=('position',))
+        paginator = LessonPositionPagination()
+        lessons = paginator.paginate_queryset(queryset, request, view=self)
+        with timed_section('ser'):
+            data = LessonSerializer(lessons, many=True, context=context).data
+        return paginator.get_paginated_response(data)
+
+    @lessons.mapping.put
+    def reorder_lessons(self, request, pk=None):
+        """
+        Меняет порядок уроков курса одним UPDATE.
+
+        Тело запроса — список id уроков курса в новом порядке; они получают позиции 1..n.
+        """
+        course = get_object_or_404(Course.objects.select_related('owner'), pk=pk)
+        self.check_object_permissions(request, course)
+        lesson_ids = request.data
+        if (not isinstance(lesson_ids, list)
+                or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in lesson_ids)
+                or len(set(lesson_ids)) != len(lesson_ids)):
+            return Response({'non_field_errors': ['Ожидается список уникальных id уроков.']},
+                            status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            if Lesson.objects.reorder(course.pk, lesson_ids) != len(lesson_ids):
+                # Часть уроков не принадлежит курсу — откатываем изменение порядка
+                transaction.set_rollback(True)
+                return Response({'non_field_errors': ['Все уроки должны принадлежать курсу.']},
+                                status=status.HTTP_400_BAD_REQUEST)
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class LessonViewSet(viewsets.ViewSet):
@@ -48,18 +196,86 @@ class LessonViewSet(viewsets.ViewSet):
     serializer_class = LessonSerializer
     permission_classes = [IsAuthenticated]
 
+    # Максимальное количество уроков в одном пакетном запросе
+    bulk_max_items = 5000
+    # Строить список из values() вместо ModelSerializer (результат тот же); включается явно
+    fast_list = False
+
+    @action(detail=False, methods=['post', 'put', 'patch'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Пакетно создает (POST) или обновляет (PUT/PATCH) уроки.
+
+        Тело запроса — список уроков; для обновления каждый элемент должен содержать ``id``.
+        Все элементы валидируются до записи, ошибки возвращаются списком по элементам,
+        а запись выполняется одной транзакцией через bulk_create/bulk_update.
+        """
+        if not isinstance(request.data, list):
+            return Response({'non_field_errors': ['Ожидается список уроков.']},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > self.bulk_max_items:
+            return Response({'non_field_errors': [f'Не более {self.bulk_max_items} уроков за запрос.']},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if request.method == 'POST':
+            serializer = LessonSerializer(data=request.data, many=True)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            serializer.save(owner=request.user)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+        ids = [item.get('id') if isinstance(item, dict) else None for item in request.data]
+        # bool — подкласс int: true/false из JSON не должны стать id 1 и 0
+        ids = [pk if isinstance(pk, int) and not isinstance(pk, bool) else None for pk in ids]
+        lessons = Lesson.objects.select_related('owner').in_bulk([pk for pk in ids if pk is not None])
+        # Ошибки по элементам: несуществующий урок или повтор id (иначе молча победил бы последний)
+        id_errors = []
+        seen = set()
+        for pk in ids:
+            if pk not in lessons:
+                id_errors.append({'id': ['Урок с таким id не найден.']})
+            elif pk in seen:
+                id_errors.append({'id': ['Урок с таким id уже указан в запросе.']})
+            else:
+                id_errors.append({})
+            seen.add(pk)
+        if any(id_errors):
+            return Response(id_errors, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = LessonSerializer([lessons[pk] for pk in ids], data=request.data, many=True,
+                                      partial=request.method == 'PATCH')
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer.save()
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Полнотекстовый поиск уроков по ``?q=`` с сортировкой по релевантности."""
+        return search_response(request, Lesson.objects.select_related('owner'), LessonSerializer)
+
     @action(detail=True, methods=['get'])
     def payments(self, request, pk=None):
-        lesson = self.get_object()
+        lesson = get_object_or_404(Lesson, pk=pk)
         payments = Payment.objects.filter(lesson=lesson)
         serializer = PaymentSerializer(payments, many=True)
         return Response(serializer.data)
 
+    @conditional_response(Lesson)
+    @cache_response('courses.lesson')
     def list(self, request):
         """Обрабатывает GET-запрос для вывода списка уроков."""
-        queryset = Lesson.objects.all()
-        serializer = LessonSerializer(queryset, many=True)
-        return Response(serializer.data)
+        context = {'request': request}
+        fast = ValuesRepresentation(LessonSerializer(context=context))
+        if self.fast_list and fast.supported:
+            # Быстрый путь: ответ строится из строк values() без экземпляров моделей
+            rows = list(fast.values(Lesson.objects.all()))
+            with timed_section('ser'):
+                return Response(fast.represent(rows))
+        queryset = defer_unrequested(Lesson.objects.select_related('owner'), LessonSerializer(context=context))
+        lessons = list(queryset)
+        with timed_section('ser'):
+            return Response(LessonSerializer(lessons, many=True, context=context).data)
 
     def create(self, request):
         """Обрабатывает POST-запрос для создания урока."""
@@ -69,12 +285,15 @@ class LessonViewSet(viewsets.ViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @conditional_response(Lesson, detail=True)
+    @cache_response('courses.lesson', detail=True)
     def retrieve(self, request, pk=None):
         """Обрабатывает GET-запрос для получения урока."""
-        queryset = Lesson.objects.all()
+        context = {'request': request}
+        queryset = defer_unrequested(Lesson.objects.select_related('owner'), LessonSerializer(context=context))
         lesson = get_object_or_404(queryset, pk=pk)
-        serializer = LessonSerializer(lesson)
-        return Response(serializer.data)
+        with timed_section('ser'):
+            return Response(LessonSerializer(lesson, context=context).data)
 
     def update(self, request, pk=None):
         """Обрабатывает PUT-запрос для обновления урока."""
@@ -92,56 +311,261 @@ class LessonViewSet(viewsets.ViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class PaymentListView(generics.ListAPIView):
+class CacheStatsView(APIView):
+    """Представление со статистикой попаданий и промахов кеша ответов API."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_cache_stats())
+
+
+class PaymentListView(SparseFieldsetViewMixin, generics.ListAPIView):
     serializer_class = PaymentSerializer
     queryset = Payment.objects.all()
-    filter_backends = (OrderingFilter,)
+    filter_backends = (DjangoFilterBackend, OrderingFilter)
+    filterset_class = PaymentFilter
     ordering_fields = ('date_paid',)
+    pagination_class = PaymentCursorPagination
+    # Строить страницу из values() вместо ModelSerializer (результат тот же); включается явно
+    fast_list = False
 
+    def list(self, request, *args, **kwargs):
+        fast = ValuesRepresentation(self.get_serializer())
+        if not (self.fast_list and fast.supported):
+            return super().list(request, *args, **kwargs)
+        queryset = fast.values(self.filter_queryset(self.get_queryset()), self.paginator.ordering_field, 'id')
+        page = self.paginate_queryset(queryset)
+        with timed_section('ser'):
+            data = fast.represent(page)
+        return self.get_paginated_response(data)
 
-# Test Secret Key
-stripe.api_key = "sk_test_4eC39HqLyjWDarjtT1zdp7dc"
 
+class _Echo:
+    """Псевдобуфер для csv.writer: возвращает записанную строку вместо буферизации."""
 
-class PaymentCreateView(APIView):
-    def post(self, request, *args, **kwargs):
-        # Получаем данные из запроса (или передаем их в теле запроса)
-        amount = request.data.get('amount')  # сумма платежа в центах
-        currency = request.data.get('currency')  # валюта (например, 'usd')
+    def write(self, value):
+        return value
 
-        # Создаем платеж в Stripe
-        payment_intent = stripe.PaymentIntent.create(
-            amount=amount,
-            currency=currency
+
+class PaymentExportView(generics.GenericAPIView):
+    """
+    Потоковая выгрузка платежей в CSV или NDJSON (``?export_format=csv|ndjson``).
+
+    Учитывает фильтры PaymentFilter и сортировку ``?ordering=date_paid|-date_paid``.
+    Строки читаются серверным курсором пачками и сразу отдаются клиенту, поэтому
+    расход памяти не зависит от размера таблицы.
+    """
+    queryset = Payment.objects.all()
+    filter_backends = (DjangoFilterBackend, OrderingFilter)
+    filterset_class = PaymentFilter
+    ordering_fields = ('date_paid',)
+    ordering = ('-date_paid',)
+    permission_classes = [IsAdminUser]
+    # Имена колонок совпадают с полями PaymentSerializer
+    export_fields = (
+        ('id', 'id'), ('user', 'user_id'), ('date_paid', 'date_paid'), ('content_type', 'content_type_id'),
+        ('object_id', 'object_id'), ('amount', 'amount'), ('payment_method', 'payment_method'),
+        ('some_course_field', 'some_course_field'), ('some_lesson_field', 'some_lesson_field'),
+        ('course', 'course_id'), ('lesson', 'lesson_id'),
+    )
+    chunk_size = 2000
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in ('csv', 'ndjson'):
+            return Response({'export_format': ['Допустимые значения: csv, ndjson.']},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.values_list(*(attname for _, attname in self.export_fields)).iterator(
+            chunk_size=self.chunk_size,
         )
+        if export_format == 'csv':
+            content, content_type = self.iter_csv(rows), 'text/csv; charset=utf-8'
+        else:
+            content, content_type = self.iter_ndjson(rows), 'application/x-ndjson'
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="payments.{export_format}"'
+        return response
+
+    @staticmethod
+    def format_value(value):
+        if isinstance(value, datetime.datetime):
+            value = value.isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    def iter_csv(self, rows):
+        writer = csv.writer(_Echo())
+        yield writer.writerow([name for name, _ in self.export_fields])
+        batch = []
+        for row in rows:
+            batch.append(writer.writerow([self.format_value(value) for value in row]))
+            if len(batch) >= self.chunk_size:
+                yield ''.join(batch)
+                batch = []
+        if batch:
+            yield ''.join(batch)
+
+    def iter_ndjson(self, rows):
+        names = [name for name, _ in self.export_fields]
+        batch = []
+        for row in rows:
+            record = dict(zip(names, (self.format_value(value) for value in row)))
+            batch.append(json.dumps(record, ensure_ascii=False))
+            if len(batch) >= self.chunk_size:
+                yield '\n'.join(batch) + '\n'
+                batch = []
+        if batch:
+            yield '\n'.join(batch) + '\n'
+
+
+class RevenueSummaryView(generics.ListAPIView):
+    """
+    Отчет о выручке по дневным сводкам.
+
+    Без параметра ``group_by`` возвращает строки сводки; с ``group_by`` (через запятую:
+    day, course, payment_method) — суммы по выбранным измерениям.
+    """
+    serializer_class = DailyRevenueSerializer
+    queryset = DailyRevenue.objects.order_by('day', 'course_id', 'payment_method')
+    permission_classes = [IsAdminUser]
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = DailyRevenueFilter
+    group_by_fields = ('day', 'course', 'payment_method')
+
+    def list(self, request, *args, **kwargs):
+        group_by = [field for field in request.query_params.get('group_by', '').split(',') if field]
+        if not group_by:
+            return super().list(request, *args, **kwargs)
+        unknown = set(group_by) - set(self.group_by_fields)
+        if unknown:
+            return Response({'group_by': [f'Недопустимые поля: {", ".join(sorted(unknown))}.']},
+                            status=status.HTTP_400_BAD_REQUEST)
+        rows = (
+            self.filter_queryset(self.get_queryset())
+            .order_by(*group_by)
+            .values(*group_by)
+            .annotate(total_amount=Sum('total_amount'), payments_count=Sum('payments_count'))
+        )
+        # Сумма форматируется полем сериализатора, как и в строках сводки без группировки
+        amount_field = self.get_serializer().fields['total_amount']
+        return Response([
+            {**row, 'total_amount': amount_field.to_representation(row['total_amount'])} for row in rows
+        ])
+
+
+def _idempotency_key(request):
+    """Берет ключ идемпотентности из заголовка клиента или генерирует новый."""
+    return request.headers.get('Idempotency-Key') or str(uuid.uuid4())
+
+
+def _paid_item_metadata(data):
+    """Выбирает из данных запроса оплачиваемый курс или урок для metadata PaymentIntent."""
+    return {name: str(data[name]) for name in ('course_id', 'lesson_id') if data.get(name)}
+
+
+def _jwt_user_id(request):
+    """Возвращает id пользователя из JWT-заголовка Authorization или None."""
+    try:
+        result = CachedJWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return result[0].pk if result else None
+
+
+def _stripe_error_response(exc):
+    """Преобразует ошибку вызова Stripe в JSON-ответ с подходящим статусом."""
+    if isinstance(exc, stripe_gateway.StripeOverloaded):
+        return JsonResponse({'error': str(exc)}, status=503)
+    if isinstance(exc, asyncio.TimeoutError):
+        return JsonResponse({'error': 'Stripe не ответил вовремя.'}, status=504)
+    return JsonResponse({'error': str(exc)}, status=502)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class PaymentCreateView(View):
+    """
+    Асинхронное создание PaymentIntent.
+
+    Вызов Stripe выполняется в ограниченном пуле потоков, поэтому под ASGI
+    обработчик не занимает рабочий поток на время ответа Stripe.
+    """
+
+    async def post(self, request, *args, **kwargs):
+        # Получаем данные из тела запроса
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({'error': 'Некорректный JSON.'}, status=400)
+        amount = data.get('amount')  # сумма платежа в центах
+        currency = data.get('currency')  # валюта (например, 'usd')
+        if not isinstance(amount, int) or amount <= 0 or not currency:
+            return JsonResponse({'error': 'Укажите amount (в центах) и currency.'}, status=400)
+        metadata = _paid_item_metadata(data)
+        user_id = await sync_to_async(_jwt_user_id)(request)
+        if user_id is not None:
+            metadata['user_id'] = str(user_id)
+
+        # Создаем платеж в Stripe
+        try:
+            payment_intent = await stripe_gateway.acreate_payment_intent(
+                amount, currency, _idempotency_key(request), metadata,
+            )
+        except (stripe_gateway.StripeOverloaded, asyncio.TimeoutError, stripe.StripeError) as exc:
+            return _stripe_error_response(exc)
 
         # Возвращаем клиенту данные для оплаты
-        return Response({
-            'client_secret': payment_intent.client_secret
-        }, status=status.HTTP_200_OK)
+        return JsonResponse({'client_secret': payment_intent.client_secret})
 
 
 class PaymentView(View):
-    def post(self, request):
+    async def post(self, request):
         amount = 1000  # Сумма оплаты
         currency = "usd"  # Валюта
 
+        # Пользователь из сессии загружается синхронным запросом к базе
+        user_id = await sync_to_async(lambda: request.user.pk)()
+        if user_id is None:
+            return JsonResponse({'error': 'Требуется авторизация.'}, status=401)
+        metadata = _paid_item_metadata(request.POST)
+        if not metadata:
+            return JsonResponse({'error': 'Укажите course_id или lesson_id.'}, status=400)
+        metadata['user_id'] = str(user_id)
+
+        # Платеж будет записан обработчиком вебхука payment_intent.succeeded
         try:
-            payment_intent = stripe.PaymentIntent.create(
-                amount=amount,
-                currency=currency
+            payment_intent = await stripe_gateway.acreate_payment_intent(
+                amount, currency, _idempotency_key(request), metadata,
             )
+        except (stripe_gateway.StripeOverloaded, asyncio.TimeoutError, stripe.StripeError) as exc:
+            return _stripe_error_response(exc)
+
+        return JsonResponse({"client_secret": payment_intent.client_secret})
+
 
-            # Создаем новый объект Payment и сохраняем его в базе данных
-            payment = Payment.objects.create(
-                user=request.user,  # Укажите пользователя, совершившего платеж
-                date_paid=payment_intent.created,
-                content_type=None,  # Укажите соответствующий content_type
-                object_id=None,  # Укажите соответствующий object_id
-                amount=amount / 100.0,  # Сумма в долларах
-                payment_method="stripe"  # Укажите метод оплаты
+@method_decorator(csrf_exempt, name='dispatch')
+class StripeWebhookView(View):
+    """
+    Прием вебхуков Stripe.
+
+    Проверяет подпись и ставит событие в очередь (таблица StripeEvent) одним INSERT;
+    повторная доставка того же события игнорируется. Платежи создаются пачками
+    задачей courses.tasks.ingest_stripe_events.
+    """
+
+    def post(self, request):
+        try:
+            event = stripe.Webhook.construct_event(
+                request.body, request.headers.get('Stripe-Signature', ''), settings.STRIPE_WEBHOOK_SECRET,
             )
+        except (ValueError, stripe.SignatureVerificationError):
+            return JsonResponse({'error': 'Некорректная подпись или тело события.'}, status=400)
 
-            return JsonResponse({"client_secret": payment_intent.client_secret})
-        except Exception as e:
-            return JsonResponse({"error": str(e)}, status=500)
+        if event['type'] in PAYMENT_EVENT_TYPES:
+            StripeEvent.objects.bulk_create([
+                StripeEvent(event_id=event['id'], event_type=event['type'], payload=json.loads(request.body)),
+            ], ignore_conflicts=True)
+        return JsonResponse({'received': True})
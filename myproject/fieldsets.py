@@ -0,0 +1,95 @@
+"""
+Разреженные наборы полей (``?fields=id,title`` / ``?exclude=description``).
+
+SparseFieldsetMixin убирает из сериализатора поля, не запрошенные клиентом, а
+defer_unrequested откладывает загрузку соответствующих колонок модели, чтобы большие
+текстовые поля не читались из базы, если их нет в ответе.
+"""
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import ListSerializer
+
+FIELDS_PARAM = 'fields'
+EXCLUDE_PARAM = 'exclude'
+
+
+def _parse_names(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsetMixin:
+    """
+    Миксин ModelSerializer, ограничивающий набор полей параметрами запроса.
+
+    Применяется только к чтению (GET/HEAD/OPTIONS) и только при наличии запроса в контексте.
+    Неизвестные имена полей игнорируются. Поля, вычисляемые из других атрибутов модели
+    (``source='*'``), перечисляются в ``Meta.field_dependencies``, чтобы их колонки не откладывались.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sparse = False
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return
+        params = request.query_params
+        requested = _parse_names(params.get(FIELDS_PARAM, ''))
+        excluded = _parse_names(params.get(EXCLUDE_PARAM, ''))
+        if requested:
+            excluded |= set(self.fields) - requested
+        for name in excluded & set(self.fields):
+            self.fields.pop(name)
+            self.sparse = True
+
+    def required_model_fields(self):
+        """Возвращает имена атрибутов модели, нужные оставшимся полям сериализатора."""
+        dependencies = getattr(self.Meta, 'field_dependencies', {})
+        names = set()
+        for name, field in self.fields.items():
+            if field.source == '*':
+                names.update(dependencies.get(name, ()))
+            else:
+                names.add(field.source.split('.')[0])
+        return names
+
+
+def defer_unrequested(queryset, serializer, keep=()):
+    """
+    Откладывает загрузку колонок модели, которые не попадут в ответ сериализатора.
+
+    Откладываются только обычные (не ключевые и не связанные) поля, поэтому
+    select_related и prefetch_related продолжают работать.
+
+    Args:
+        queryset (QuerySet): Исходный набор записей.
+        serializer (Serializer): Сериализатор ответа (или списочный сериализатор).
+        keep (Iterable[str]): Поля, нужные помимо сериализатора (например, для пагинации).
+
+    Returns:
+        QuerySet: Набор записей с отложенными колонками.
+
+    """
+    if isinstance(serializer, ListSerializer):
+        serializer = serializer.child
+    if not getattr(serializer, 'sparse', False):
+        return queryset
+    required = serializer.required_model_fields() | set(keep)
+    deferred = [
+        field.name for field in queryset.model._meta.concrete_fields
+        if not field.primary_key and not field.is_relation and field.name not in required
+    ]
+    return queryset.defer(*deferred) if deferred else queryset
+
+
+class SparseFieldsetViewMixin:
+    """
+    Миксин GenericAPIView: откладывает колонки, не запрошенные через ``?fields=``/``?exclude=``.
+
+    Поле сортировки пагинатора (``ordering_field``) всегда загружается, так как нужно для курсора.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        ordering_field = getattr(self.pagination_class, 'ordering_field', None)
+        return defer_unrequested(queryset, self.get_serializer(), keep=filter(None, [ordering_field]))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from courses.models import Payment
+
+
+class Command(BaseCommand):
+    """
+    Команда Django для заполнения ссылок на курс и урок у существующих платежей.
+
+    Использование:
+    python manage.py backfill_payment_items [--batch-size 50000]
+
+    """
+    help = 'Заполнить course/lesson у платежей по content_type/object_id'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50000,
+                            help='Ширина диапазона первичных ключей для одного UPDATE-запроса')
+
+    def handle(self, *args, **options):
+        """
+        Обработка команды: заполняет ссылки диапазонами первичных ключей.
+
+        Аргументы:
+            *args: Дополнительные аргументы.
+            **options: Параметры команды.
+
+        """
+        updated = Payment.objects.backfill_paid_items(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Обновлено платежей: {updated}.'))
@@ -0,0 +1,257 @@
+import csv
+import datetime
+import io
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+
+from courses.models import Course, DailyRevenue, Lesson, Payment, Subscription
+from users_app.models import UserProfile
+
+YOUTUBE_LINK = 'https://www.youtube.com/watch?v={}'
+COUNTRIES = ['RU', 'BY', 'KZ', 'AM', 'GE', 'UZ', 'RS', 'DE']
+PAYMENT_METHODS = ['cash', 'bank_transfer', 'stripe']
+COPY_NULL = r'\N'
+
+
+class _CsvStream(io.RawIOBase):
+    """Файлоподобный объект, отдающий строки генератора в формате CSV по мере чтения (для COPY)."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer, lineterminator='\n')
+        self.pending = b''
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = 1 << 16
+        while len(self.pending) < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            self.writer.writerow([COPY_NULL if value is None else value for value in row])
+            # Сбрасываем буфер пачками, чтобы не вызывать encode() на каждую строку
+            if self.buffer.tell() > size:
+                self.pending += self.buffer.getvalue().encode()
+                self.buffer.seek(0)
+                self.buffer.truncate()
+        if self.buffer.tell():
+            self.pending += self.buffer.getvalue().encode()
+            self.buffer.seek(0)
+            self.buffer.truncate()
+        chunk, self.pending = self.pending[:size], self.pending[size:]
+        return chunk
+
+
+class Command(BaseCommand):
+    """
+    Команда Django для генерации синтетических данных для нагрузочного тестирования.
+
+    На PostgreSQL строки передаются потоком через COPY, на других СУБД — через
+    bulk_create пачками; память не зависит от объема. Данные детерминированы зерном.
+
+    Использование:
+    python manage.py generate_load_data --users 100000 --courses 1000 --payments 10000000 --seed 42
+
+    """
+    help = 'Сгенерировать синтетические данные для нагрузочного тестирования'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Пользователей (у каждого есть профиль)')
+        parser.add_argument('--courses', type=int, default=100)
+        parser.add_argument('--lessons-per-course', type=int, default=10)
+        parser.add_argument('--subscriptions', type=int, default=5000)
+        parser.add_argument('--payments', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0, help='Зерно генератора случайных чисел')
+        parser.add_argument('--anchor', default='2024-01-01',
+                            help='Дата, от которой отсчитываются даты платежей (YYYY-MM-DD)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Размер пачки для bulk_create')
+
+    def handle(self, *args, **options):
+        """
+        Обработка команды: генерирует таблицы по очереди и сообщает скорость вставки.
+
+        Аргументы:
+            *args: Дополнительные аргументы.
+            **options: Параметры команды.
+
+        """
+        if options['subscriptions'] > options['users'] * options['courses']:
+            raise CommandError('Подписок больше, чем возможных пар пользователь-курс.')
+        if options['payments'] and not (options['users'] and options['courses']):
+            raise CommandError('Для платежей нужны пользователи и курсы.')
+        try:
+            anchor = datetime.datetime.combine(datetime.date.fromisoformat(options['anchor']), datetime.time.min,
+                                               tzinfo=datetime.timezone.utc)
+        except ValueError as exc:
+            raise CommandError(f'Некорректная дата: {exc}')
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.anchor = anchor
+        self.use_copy = connection.vendor == 'postgresql'
+
+        User = get_user_model()
+        plan = [
+            (User, options['users'], self.user_rows),
+            (UserProfile, options['users'], self.profile_rows),
+            (Course, options['courses'], self.course_rows),
+            (Lesson, options['courses'] * options['lessons_per_course'], self.lesson_rows),
+            (Subscription, options['subscriptions'], self.subscription_rows),
+            (Payment, options['payments'], self.payment_rows),
+        ]
+        self.options = options
+        self.first_ids = {}
+        total_rows = 0
+        started = time.perf_counter()
+        for model, count, rows in plan:
+            self.first_ids[model] = (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+            if not count:
+                continue
+            table_started = time.perf_counter()
+            with transaction.atomic():
+                self.load(model, rows(self.first_ids[model], count))
+            elapsed = time.perf_counter() - table_started
+            total_rows += count
+            self.stdout.write(f'{model._meta.db_table}: {count} строк за {elapsed:.1f} с '
+                              f'({count / max(elapsed, 1e-9):,.0f} строк/с)')
+
+        self.reset_sequences([model for model, _, _ in plan])
+        if options['subscriptions']:
+            Course.objects.refresh_subscriber_counts()
+        if options['payments']:
+            last_day = (anchor - datetime.timedelta(days=1)).date()
+            DailyRevenue.objects.rebuild(last_day - datetime.timedelta(days=365), last_day)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано {total_rows} строк за {elapsed:.1f} с ({total_rows / max(elapsed, 1e-9):,.0f} строк/с, '
+            f'{"COPY" if self.use_copy else "bulk_create"}).'
+        ))
+
+    def load(self, model, rows):
+        """Записывает строки (словари по attname) через COPY или bulk_create."""
+        fields = model._meta.local_concrete_fields
+        if not self.use_copy:
+            batch = []
+            for row in rows:
+                batch.append(model(**row))
+                if len(batch) >= self.batch_size:
+                    model.objects.bulk_create(batch)
+                    batch = []
+            if batch:
+                model.objects.bulk_create(batch)
+            return
+
+        defaults = {field.attname: field.get_default() for field in fields}
+        prepared = (
+            tuple(field.get_db_prep_save(row.get(field.attname, defaults[field.attname]), connection)
+                  for field in fields)
+            for row in rows
+        )
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+        table = connection.ops.quote_name(model._meta.db_table)
+        with connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, 'copy'):
+                # psycopg 3
+                with raw.copy(f'COPY {table} ({columns}) FROM STDIN') as copy:
+                    for row in prepared:
+                        copy.write_row(row)
+            else:
+                # psycopg2
+                raw.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+                                _CsvStream(prepared))
+
+    def reset_sequences(self, models):
+        """Сдвигает последовательности первичных ключей после вставки с явными id."""
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+
+    def pick(self, model, count):
+        """Возвращает случайный id среди сгенерированных объектов модели."""
+        return self.first_ids[model] + self.rng.randrange(count)
+
+    def user_rows(self, first_id, count):
+        password = make_password('load-test')
+        for offset in range(count):
+            pk = first_id + offset
+            yield {
+                'id': pk, 'password': password, 'username': f'load-user-{pk}', 'email': f'load-user-{pk}@example.com',
+                'first_name': '', 'last_name': '', 'is_staff': False, 'is_superuser': False, 'is_active': True,
+                'date_joined': self.anchor, 'last_login': self.anchor - datetime.timedelta(
+                    days=self.rng.randrange(90)),
+            }
+
+    def profile_rows(self, first_id, count):
+        first_user = self.first_ids[get_user_model()]
+        for offset in range(count):
+            user_id = first_user + offset
+            yield {
+                'id': first_id + offset, 'user_id': user_id, 'email': f'load-user-{user_id}@example.com',
+                'first_name': f'Имя {user_id}', 'last_name': f'Фамилия {user_id}',
+                'country': self.rng.choice(COUNTRIES), 'is_moderator': False, 'date_of_birth': None, 'avatar': None,
+            }
+
+    def course_rows(self, first_id, count):
+        owner_id = self.first_ids[get_user_model()]
+        for offset in range(count):
+            pk = first_id + offset
+            yield {
+                'id': pk, 'title': f'Курс {pk}', 'description': f'Описание курса {pk}', 'owner_id': owner_id,
+                'lesson_count': self.options['lessons_per_course'], 'subscriber_count': 0,
+                'updated_at': self.anchor, 'preview_image': None,
+            }
+
+    def lesson_rows(self, first_id, count):
+        owner_id = self.first_ids[get_user_model()]
+        per_course = self.options['lessons_per_course']
+        for offset in range(count):
+            pk = first_id + offset
+            links = '\n'.join(YOUTUBE_LINK.format(f'{self.rng.getrandbits(40):010x}') for _ in range(3))
+            yield {
+                'id': pk, 'title': f'Урок {pk}', 'description': f'Описание урока {pk}',
+                'video_links': YOUTUBE_LINK.format(pk), 'materials': links, 'owner_id': owner_id,
+                'course_id': self.first_ids[Course] + offset // per_course, 'position': offset % per_course + 1,
+                'updated_at': self.anchor, 'preview_image': None,
+            }
+
+    def subscription_rows(self, first_id, count):
+        users = self.options['users']
+        courses = self.options['courses']
+        first_profile = self.first_ids[UserProfile]
+        first_course = self.first_ids[Course]
+        for offset in range(count):
+            # Пары (профиль, курс) не повторяются: k-я подписка профиля — на курс со сдвигом k
+            profile, shift = offset % users, offset // users
+            yield {
+                'id': first_id + offset, 'user_id': first_profile + profile,
+                'course_id': first_course + (profile + shift) % courses, 'subscribed_at': self.anchor,
+            }
+
+    def payment_rows(self, first_id, count):
+        course_type_id = ContentType.objects.get_for_model(Course).pk
+        users = self.options['users']
+        courses = self.options['courses']
+        for offset in range(count):
+            course_id = self.pick(Course, courses)
+            yield {
+                'id': first_id + offset, 'user_id': self.pick(get_user_model(), users),
+                'date_paid': self.anchor - datetime.timedelta(seconds=self.rng.randrange(365 * 24 * 3600)),
+                'content_type_id': course_type_id, 'object_id': course_id, 'course_id': course_id,
+                'lesson_id': None, 'amount': Decimal(self.rng.randrange(100, 100000)) / 100,
+                'payment_method': self.rng.choice(PAYMENT_METHODS),
+                'some_course_field': '', 'some_lesson_field': '',
+            }
@@ -0,0 +1,43 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from courses.models import DailyRevenue
+
+
+class Command(BaseCommand):
+    """
+    Команда Django для пересчета дневных сводок выручки за диапазон дат.
+
+    Использование:
+    python manage.py rebuild_revenue --from 2023-10-01 --to 2023-10-31
+
+    """
+    help = 'Пересчитать дневные сводки выручки по таблице платежей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', required=True, help='Первый день (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', help='Последний день (YYYY-MM-DD), по умолчанию сегодня')
+
+    def handle(self, *args, **options):
+        """
+        Обработка команды: удаляет и заново агрегирует сводки за диапазон.
+
+        Аргументы:
+            *args: Дополнительные аргументы.
+            **options: Параметры команды.
+
+        """
+        try:
+            date_from = datetime.date.fromisoformat(options['date_from'])
+            date_to = datetime.date.fromisoformat(options['date_to']) if options['date_to'] else timezone.localdate()
+        except ValueError as exc:
+            raise CommandError(f'Некорректная дата: {exc}')
+        if date_from > date_to:
+            raise CommandError('Дата начала позже даты окончания.')
+
+        created = DailyRevenue.objects.rebuild(date_from, date_to)
+        self.stdout.write(self.style.SUCCESS(
+            f'Сводки выручки за {date_from} — {date_to} пересчитаны: строк {created}.'
+        ))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    """
+    Команда Django для пересчета денормализованных счетчиков уроков курсов.
+
+    Использование:
+    python manage.py reconcile_lesson_counts [--batch-size 10000]
+
+    """
+    help = 'Пересчитать счетчики уроков курсов по фактическим данным'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000,
+                            help='Количество курсов, пересчитываемых одним UPDATE-запросом')
+
+    def handle(self, *args, **options):
+        """
+        Пересчитывает счетчики пачками первичных ключей, чтобы ограничить время блокировок.
+
+        Аргументы:
+            *args: Дополнительные аргументы.
+            **options: Параметры команды.
+
+        """
+        batch_size = options['batch_size']
+
+        # Пересчет обновляет только курсы с расхождением, поэтому итог — масштаб дрейфа
+        last_pk = 0
+        updated = 0
+        while True:
+            pks = list(
+                Course.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            with transaction.atomic():
+                updated += Course.objects.refresh_lesson_counts(pks)
+            last_pk = pks[-1]
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Счетчики уроков пересчитаны: исправлено расхождений {updated}.'
+        ))
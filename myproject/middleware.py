@@ -0,0 +1,222 @@
+"""
+Инструментирование запросов: количество и время SQL-запросов, время сериализации
+и общее время обработки.
+
+Метрики пишутся в лог ``myproject.metrics`` в виде JSON и агрегируются по маршрутам
+(``course-list``, ``lesson-detail`` и т.д.). Заголовок Server-Timing раскрывает число
+и время SQL-запросов, поэтому отдается только при DEBUG или сотрудникам (is_staff).
+Доля инструментируемых запросов задается настройкой REQUEST_METRICS_SAMPLE_RATE.
+
+Метрики текущего запроса хранятся в ContextVar, поэтому учитываются и запросы к базе
+из потоков sync_to_async при работе под ASGI. Время сериализации отмечают сами
+представления и рендереры через timed_section().
+"""
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger('myproject.metrics')
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Метрики одного запроса."""
+    __slots__ = ('queries', 'db_time', 'sections', '_active')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.sections = {}
+        self._active = set()
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+
+def record_query(execute, sql, params, many, context):
+    """Обертка выполнения SQL: учитывает запрос в метриках текущего запроса, если они собираются."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.db_wrapper(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection):
+    """Добавляет record_query к соединению с базой (повторно не добавляет)."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(connection_created)
+def install_query_recorder_on_connect(sender, connection, **kwargs):
+    # Соединения потоков (в том числе потоков sync_to_async) создаются лениво
+    install_query_recorder(connection)
+
+
+@contextmanager
+def timed_section(name):
+    """
+    Добавляет время выполнения блока к метрике ``name`` текущего запроса.
+
+    Вложенные блоки с тем же именем не учитываются повторно. Вне инструментируемого
+    запроса ничего не делает.
+
+    Args:
+        name (str): Имя метрики в Server-Timing, например ``ser``.
+
+    """
+    metrics = _current.get()
+    if metrics is None or name in metrics._active:
+        yield
+        return
+    metrics._active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.sections[name] = metrics.sections.get(name, 0.0) + time.perf_counter() - started
+        metrics._active.discard(name)
+
+
+class RouteStats:
+    """Потокобезопасная агрегированная статистика по маршрутам в пределах процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, route, total, db_time, queries, serializer_time):
+        with self._lock:
+            stats = self._routes.setdefault(route, {
+                'count': 0, 'total_ms': 0.0, 'db_ms': 0.0, 'serializer_ms': 0.0, 'queries': 0, 'max_ms': 0.0,
+            })
+            stats['count'] += 1
+            stats['total_ms'] += total * 1000
+            stats['db_ms'] += db_time * 1000
+            stats['serializer_ms'] += serializer_time * 1000
+            stats['queries'] += queries
+            stats['max_ms'] = max(stats['max_ms'], total * 1000)
+
+    def snapshot(self):
+        """
+        Возвращает средние значения по маршрутам.
+
+        Returns:
+            dict: ``{route: {count, avg_ms, avg_db_ms, avg_serializer_ms, avg_queries, max_ms}}``.
+
+        """
+        with self._lock:
+            return {
+                route: {
+                    'count': stats['count'],
+                    'avg_ms': round(stats['total_ms'] / stats['count'], 3),
+                    'avg_db_ms': round(stats['db_ms'] / stats['count'], 3),
+                    'avg_serializer_ms': round(stats['serializer_ms'] / stats['count'], 3),
+                    'avg_queries': round(stats['queries'] / stats['count'], 2),
+                    'max_ms': round(stats['max_ms'], 3),
+                }
+                for route, stats in self._routes.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+route_stats = RouteStats()
+
+
+def get_route_stats():
+    """Возвращает агрегированную статистику по маршрутам текущего процесса."""
+    return route_stats.snapshot()
+
+
+class RequestMetricsMiddleware:
+    """Middleware, собирающее метрики для выборки запросов (синхронных и асинхронных)."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.sample_rate = getattr(settings, 'REQUEST_METRICS_SAMPLE_RATE', 1.0)
+        # Соединения, открытые до загрузки middleware, сигнал connection_created уже пропустили
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+
+    def sampled(self):
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - started)
+
+    @staticmethod
+    def exposes_timing(request):
+        # Пользователя, аутентифицированного в DRF (JWT), Request переносит и в HttpRequest
+        user = getattr(request, 'user', None)
+        return settings.DEBUG or bool(user and user.is_staff)
+
+    def finish(self, request, response, metrics, total):
+        """Добавляет заголовок Server-Timing и записывает метрики запроса в лог и статистику маршрутов."""
+        serializer_time = metrics.sections.get('ser', 0.0) + metrics.sections.get('render', 0.0)
+        if self.exposes_timing(request):
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.queries} queries"',
+                *(f'{name};dur={duration * 1000:.2f}' for name, duration in metrics.sections.items()),
+                f'total;dur={total * 1000:.2f}',
+            ])
+
+        match = request.resolver_match
+        route = match.view_name if match is not None else None
+        route_stats.record(route, total, metrics.db_time, metrics.queries, serializer_time)
+        logger.info(json.dumps({
+            'route': route,
+            'method': request.method,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 3),
+            'db_ms': round(metrics.db_time * 1000, 3),
+            'queries': metrics.queries,
+            'serializer_ms': round(serializer_time * 1000, 3),
+        }))
+        return response
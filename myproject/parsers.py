@@ -0,0 +1,35 @@
+"""Парсеры тел запросов API."""
+import datetime
+from decimal import Decimal, InvalidOperation
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .renderers import (MSGPACK_EXT_DATE, MSGPACK_EXT_DATETIME, MSGPACK_EXT_DECIMAL, MSGPACK_EXT_TIME,
+                        msgpack)
+
+MSGPACK_EXT_DECODERS = {
+    MSGPACK_EXT_DECIMAL: Decimal,
+    MSGPACK_EXT_DATETIME: datetime.datetime.fromisoformat,
+    MSGPACK_EXT_DATE: datetime.date.fromisoformat,
+    MSGPACK_EXT_TIME: datetime.time.fromisoformat,
+}
+
+
+def decode_msgpack_ext(code, data):
+    """Восстанавливает Decimal и дату/время из ext-типов MessagePackRenderer."""
+    decoder = MSGPACK_EXT_DECODERS.get(code)
+    if decoder is None:
+        return msgpack.ExtType(code, data)
+    return decoder(data.decode())
+
+
+class MessagePackParser(BaseParser):
+    """Парсер тел запросов ``Content-Type: application/msgpack`` (требует пакет msgpack)."""
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), ext_hook=decode_msgpack_ext, raw=False)
+        except (ValueError, TypeError, InvalidOperation, msgpack.UnpackException) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
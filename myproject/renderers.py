@@ -0,0 +1,90 @@
+"""
+Рендереры ответов API.
+
+ORJSONRenderer выдает те же байты, что и стандартный JSONRenderer DRF (компактный
+UTF-8 JSON без экранирования не-ASCII символов), но кодирует данные на C через orjson.
+Типы, которые orjson не знает или кодирует иначе (datetime, Decimal, ленивые строки),
+передаются кодировщику DRF, поэтому их представление тоже совпадает.
+
+MessagePackRenderer отдает те же данные в формате MessagePack (``Accept: application/msgpack``).
+Decimal и дата/время, если встречаются в данных, передаются ext-типами без потери точности.
+"""
+import datetime
+from decimal import Decimal
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .middleware import timed_section
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson необязателен
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack необязателен
+    msgpack = None
+
+# Коды ext-типов MessagePack (значение передается строкой в UTF-8)
+MSGPACK_EXT_DECIMAL = 1
+MSGPACK_EXT_DATETIME = 2
+MSGPACK_EXT_DATE = 3
+MSGPACK_EXT_TIME = 4
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON-рендерер на orjson с побайтно тем же результатом, что и JSONRenderer.
+
+    Для форматированного вывода (``indent``), ASCII-режима, некомпактного JSON и данных,
+    которые orjson не может закодировать (например, целых больше 64 бит), используется
+    стандартный JSONRenderer. Отличается только запись float в экспоненциальной форме
+    (``1e-7`` вместо ``1e-07``); в ответах API дробные числа передаются строками.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        with timed_section('render'):
+            if orjson is None or indent or self.ensure_ascii or not self.compact:
+                return super().render(data, accepted_media_type, renderer_context)
+            try:
+                ret = orjson.dumps(data, default=JSONEncoder().default, option=ORJSON_OPTIONS)
+            except orjson.JSONEncodeError:
+                return super().render(data, accepted_media_type, renderer_context)
+        # Как и JSONRenderer, экранируем разделители строк, недопустимые в JavaScript
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+def encode_msgpack_ext(obj):
+    """Кодирует типы, которых нет в MessagePack: Decimal и дату/время — ext-типами, прочее — как DRF."""
+    if isinstance(obj, Decimal):
+        return msgpack.ExtType(MSGPACK_EXT_DECIMAL, str(obj).encode())
+    if isinstance(obj, datetime.datetime):
+        return msgpack.ExtType(MSGPACK_EXT_DATETIME, obj.isoformat().encode())
+    if isinstance(obj, datetime.date):
+        return msgpack.ExtType(MSGPACK_EXT_DATE, obj.isoformat().encode())
+    if isinstance(obj, datetime.time):
+        return msgpack.ExtType(MSGPACK_EXT_TIME, obj.isoformat().encode())
+    return JSONEncoder().default(obj)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Рендерер MessagePack для межсервисных запросов (требует пакет msgpack)."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        with timed_section('render'):
+            return msgpack.packb(data, default=encode_msgpack_ext, use_bin_type=True)
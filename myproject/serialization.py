@@ -0,0 +1,134 @@
+"""
+Быстрое представление списков из строк ``values()``.
+
+ValuesRepresentation заранее сопоставляет каждому полю ModelSerializer колонку запроса
+и функцию преобразования, после чего строит ответ прямо из словарей ``values()``:
+без создания экземпляров моделей и без обхода полей сериализатора для каждой строки.
+Результат совпадает с ``serializer.data``; сериализаторы с полями, которые так
+представить нельзя (SerializerMethodField, M2M, вложенные сериализаторы), не поддерживаются.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import fields, relations
+from rest_framework.settings import api_settings
+
+# Поля, представление которых совпадает со значением из базы
+IDENTITY_FIELDS = (fields.CharField, fields.IntegerField, fields.BooleanField, fields.ReadOnlyField)
+# Поля, для которых вызывается их собственный to_representation
+CONVERTED_FIELDS = (fields.DecimalField, fields.DateTimeField, fields.DateField, fields.TimeField,
+                    fields.ChoiceField, fields.FloatField, fields.UUIDField, fields.JSONField)
+
+
+class ValuesRepresentation:
+    """
+    План построения ответа сериализатора из строк ``values()``.
+
+    Attributes:
+        supported (bool): Можно ли представить все поля сериализатора.
+        plan (list[tuple]): Тройки (имя поля ответа, колонка values(), преобразование или None).
+
+    """
+
+    def __init__(self, serializer):
+        self.serializer = getattr(serializer, 'child', serializer)
+        self.model = self.serializer.Meta.model
+        self.plan = []
+        self.supported = True
+        for name, field in self.serializer.fields.items():
+            if field.write_only:
+                continue
+            step = self.build_step(field)
+            if step is None:
+                self.supported = False
+                self.plan = []
+                return
+            self.plan.append((name,) + step)
+
+    @property
+    def columns(self):
+        """Колонки, которые нужно выбрать через ``values()``."""
+        return [key for _, key, _ in self.plan]
+
+    def build_step(self, field):
+        """Возвращает (колонка, преобразование) для поля сериализатора или None."""
+        if field.source == '*':
+            return None
+        try:
+            model_field = self.resolve(field.source_attrs)
+        except FieldDoesNotExist:
+            return None
+        if model_field is None:
+            return None
+        key = '__'.join(field.source_attrs)
+
+        if isinstance(field, relations.PrimaryKeyRelatedField):
+            if field.pk_field is not None or len(field.source_attrs) != 1 or not model_field.many_to_one:
+                return None
+            return model_field.attname, None
+        if model_field.is_relation:
+            return None
+        if isinstance(field, fields.FileField):
+            return key, self.file_converter(field, model_field)
+        if isinstance(field, CONVERTED_FIELDS):
+            return key, field.to_representation
+        if isinstance(field, IDENTITY_FIELDS):
+            return key, None
+        return None
+
+    def resolve(self, attrs):
+        """
+        Находит поле модели по пути source, проходя только по обязательным FK.
+
+        Через необязательную связь сериализатор пропускает поле, а values() вернул бы None,
+        поэтому такие пути не поддерживаются.
+        """
+        opts = self.model._meta
+        for attr in attrs[:-1]:
+            relation = opts.get_field(attr)
+            if not (relation.many_to_one or relation.one_to_one) or relation.null:
+                return None
+            opts = relation.related_model._meta
+        model_field = opts.get_field(attrs[-1])
+        if not model_field.concrete or model_field.many_to_many:
+            return None
+        return model_field
+
+    def file_converter(self, field, model_field):
+        """Повторяет FileField.to_representation для имени файла из базы."""
+        storage = model_field.storage
+        request = field.context.get('request')
+        use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+
+        def convert(name):
+            if not name:
+                return None
+            if not use_url:
+                return name
+            url = storage.url(name)
+            return request.build_absolute_uri(url) if request is not None else url
+
+        return convert
+
+    def values(self, queryset, *extra):
+        """Набор словарей с колонками плана и дополнительными колонками (например, для курсора)."""
+        return queryset.values(*dict.fromkeys(self.columns + list(extra)))
+
+    def represent(self, rows):
+        """
+        Строит представление строк так же, как ``serializer.data``.
+
+        Args:
+            rows (Iterable[dict]): Строки ``values()``.
+
+        Returns:
+            list[dict]: Представления записей.
+
+        """
+        plan = self.plan
+        result = []
+        for row in rows:
+            item = {}
+            for name, key, convert in plan:
+                value = row[key]
+                item[name] = value if value is None or convert is None else convert(value)
+            result.append(item)
+        return result
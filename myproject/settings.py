@@ -9,6 +9,9 @@ https://docs.djangoproject.com/en/4.2/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
+import importlib.util
+import os
+import sys
 from pathlib import Path
 from datetime import timedelta
 
@@ -45,6 +48,7 @@ INSTALLED_APPS = [
 
     'users_app',
     'courses',
+    'myproject',
 
     "drf_yasg",
     'django_celery_beat',
@@ -53,6 +57,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'myproject.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -98,6 +103,38 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+TESTING = 'test' in sys.argv
+
+# Локальный прогон тестов без PostgreSQL: TEST_DATABASE=sqlite python manage.py test
+# (полнотекстовый поиск в этом режиме работает через SQLite FTS5, см. courses/search.py)
+if TESTING and os.getenv('TEST_DATABASE') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+
+if TESTING:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/1'),
+        }
+    }
+
+# Время жизни закешированных ответов API (версии моделей хранятся без ограничения)
+RESPONSE_CACHE_TIMEOUT = 300
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -138,12 +175,34 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# MessagePack для межсервисных запросов (Accept/Content-Type: application/msgpack), если установлен msgpack
+if importlib.util.find_spec('msgpack') is not None:
+    MSGPACK_RENDERER_CLASSES = ('myproject.renderers.MessagePackRenderer',)
+    MSGPACK_PARSER_CLASSES = ('myproject.parsers.MessagePackParser',)
+else:
+    MSGPACK_RENDERER_CLASSES = MSGPACK_PARSER_CLASSES = ()
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users_app.authentication.CachedJWTAuthentication',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        # Тот же JSON, что у JSONRenderer, но кодируется orjson
+        'myproject.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ) + MSGPACK_RENDERER_CLASSES,
+    'DEFAULT_PARSER_CLASSES': (
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ) + MSGPACK_PARSER_CLASSES,
 }
 
+# Время жизни пользователя в кеше JWT-аутентификации (секунды)
+JWT_USER_CACHE_TIMEOUT = 60
+# Время жизни снимка групп пользователя в кеше (секунды); сбрасывается при изменении групп
+PERMISSION_CACHE_TIMEOUT = 300
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),  # Продолжительность действия токена
     'REFRESH_TOKEN_LIFETIME': timedelta(days=30),  # Продолжительность действия refresh-токена
@@ -155,13 +214,55 @@ SIMPLE_JWT = {
 # Configure Celery
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
 CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
+# В тестах задачи (включая chord-рассылки) выполняются синхронно
+CELERY_TASK_ALWAYS_EAGER = TESTING
+CELERY_TASK_EAGER_PROPAGATES = TESTING
 # Расписание для Celery Beat: проверка каждый день в полночь
 CELERY_BEAT_SCHEDULE = {
     'check_inactive_users': {
         'task': 'users_app.tasks.check_and_lock_inactive_users',
         'schedule': timedelta(days=1),
     },
+    # Создание платежей по накопленным вебхукам Stripe пачками
+    'ingest_stripe_events': {
+        'task': 'courses.tasks.ingest_stripe_events',
+        'schedule': timedelta(seconds=5),
+    },
 }
 
+# Доля запросов, для которых собираются метрики (Server-Timing, лог myproject.metrics);
+# в тестах выключено, чтобы строки метрик не попадали в вывод
+REQUEST_METRICS_SAMPLE_RATE = float(os.getenv('REQUEST_METRICS_SAMPLE_RATE', '0' if TESTING else '0.05'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'myproject.metrics': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# Считать уроки курса через COUNT-аннотацию вместо денормализованного счетчика lesson_count
+COURSES_LESSON_COUNT_FROM_ANNOTATION = False
+
+# Stripe: вызовы выполняются в ограниченном пуле потоков (courses.stripe_gateway)
+STRIPE_SECRET_KEY = os.getenv('STRIPE_SECRET_KEY', 'sk_test_4eC39HqLyjWDarjtT1zdp7dc')
+STRIPE_WEBHOOK_SECRET = os.getenv('STRIPE_WEBHOOK_SECRET', '')
+STRIPE_API_BASE = os.getenv('STRIPE_API_BASE', 'https://api.stripe.com')
+STRIPE_MAX_WORKERS = int(os.getenv('STRIPE_MAX_WORKERS', '64'))  # Одновременных вызовов на процесс
+STRIPE_MAX_QUEUED = int(os.getenv('STRIPE_MAX_QUEUED', '256'))  # Вызовов в очереди сверх пула
+STRIPE_TIMEOUT = 10  # Общий таймаут ожидания ответа, секунды
+STRIPE_REQUEST_TIMEOUT = 8  # Таймаут HTTP-запроса, секунды
+STRIPE_MAX_NETWORK_RETRIES = 2  # Повторы сетевых ошибок (безопасны благодаря ключам идемпотентности)
+
 CORS_ORIGIN_ALLOW_ALL = True  # Разрешить доступ со всех доменов
 CORS_ALLOW_CREDENTIALS = True  # Разрешить отправку учетных данных
\ No newline at end of file
@@ -0,0 +1,76 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Count, Sum
+from django.test import SimpleTestCase, TestCase
+
+from courses.models import Course, DailyRevenue, Lesson, Payment, Subscription
+from users_app.models import UserProfile
+from .utils import find_invalid_links, is_youtube_link
+
+
+class YoutubeLinkTestCase(SimpleTestCase):
+    """Тесты проверки ссылок в материалах уроков."""
+
+    def test_allowed_hosts(self):
+        for link in ('https://www.youtube.com/watch?v=dQw4w9WgXcQ', 'https://youtu.be/dQw4w9WgXcQ',
+                     'https://m.youtube.com/watch?v=1', 'https://WWW.YouTube.com/', '  https://youtube.com  '):
+            with self.subTest(link=link):
+                self.assertTrue(is_youtube_link(link))
+
+    def test_rejected_links(self):
+        for link in (
+            'http://www.youtube.com/watch?v=1',  # без https
+            'https://youtube.com.evil.com/watch',  # хост, начинающийся с youtube.com
+            'https://evilyoutube.com/',
+            'https://www.youtube.com./watch',
+            'https://www.youtube.com@evil.com/',  # учетные данные вместо хоста
+            'https://evil.com@www.youtube.com/',
+            'https://evil.com\\@www.youtube.com/',
+            'https://www.youtube.com/watch?v=1 https://evil.com/',
+            'https://[www.youtube.com/',
+            'www.youtube.com/watch',
+            '',
+        ):
+            with self.subTest(link=link):
+                self.assertFalse(is_youtube_link(link))
+
+    def test_find_invalid_links_reports_line_numbers(self):
+        materials = '\n'.join([
+            'https://www.youtube.com/watch?v=1',
+            '',
+            '   ',
+            'https://youtube.com.evil.com/x',
+            'https://youtu.be/2\r',
+            ' https://evil.com@youtube.com ',
+        ]) + '\n'
+        self.assertEqual(find_invalid_links(materials), [
+            (4, 'https://youtube.com.evil.com/x'),
+            (6, 'https://evil.com@youtube.com'),
+        ])
+        self.assertEqual(find_invalid_links(''), [])
+        self.assertEqual(find_invalid_links('\n\n'), [])
+
+
+class GenerateLoadDataTestCase(TestCase):
+    """Тесты генерации данных для нагрузочного тестирования (путь bulk_create)."""
+
+    def test_generates_consistent_rows(self):
+        out = StringIO()
+        call_command('generate_load_data', users=6, courses=3, lessons_per_course=2, subscriptions=10,
+                     payments=25, batch_size=4, seed=1, stdout=out)
+        self.assertIn('Создано', out.getvalue())
+
+        counts = {model: model.objects.count()
+                  for model in (get_user_model(), UserProfile, Course, Lesson, Subscription, Payment)}
+        self.assertEqual(list(counts.values()), [6, 6, 3, 6, 10, 25])
+        for course in Course.objects.annotate(lessons=Count('lesson', distinct=True),
+                                              subscribers=Count('subscription', distinct=True)):
+            self.assertEqual((course.lesson_count, course.subscriber_count), (course.lessons, course.subscribers))
+        self.assertEqual(
+            DailyRevenue.objects.aggregate(amount=Sum('total_amount'), count=Sum('payments_count')),
+            {'amount': Payment.objects.aggregate(amount=Sum('amount'))['amount'], 'count': 25},
+        )
+        # После вставки с явными id новые записи получают свободные первичные ключи
+        Course.objects.create(title='Новый курс', description='Описание', owner=get_user_model().objects.first())
@@ -1,6 +1,75 @@
 import re
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+# Хосты, ссылки на которые разрешены в материалах уроков
+YOUTUBE_HOSTS = frozenset({'youtube.com', 'www.youtube.com', 'm.youtube.com', 'youtu.be'})
+
+# Предкомпилированная проверка формы ссылки: https-схема, хост и необязательный путь без пробелов
+_LINK_RE = re.compile(r'https://[^\s/?#]+(?:[/?#]\S*)?')
 
 
 # Функция для проверки ссылки на youtube.com
+@lru_cache(maxsize=8192)
 def is_youtube_link(link):
-    return re.match(r'^https:\/\/www\.youtube\.com\/', link) is not None
\ No newline at end of file
+    """
+    Проверяет, что ссылка ведет на YouTube.
+
+    Результаты кешируются, так как одни и те же ссылки часто повторяются в материалах.
+
+    Args:
+        link (str): Проверяемая ссылка.
+
+    Returns:
+        bool: True, если ссылка использует https и хост из YOUTUBE_HOSTS.
+
+    """
+    link = link.strip()
+    if _LINK_RE.fullmatch(link) is None:
+        return False
+    try:
+        parts = urlsplit(link)
+    except ValueError:
+        return False
+    # Ссылки с учетными данными не принимаем: браузеры разбирают их иначе, чем urlsplit
+    # (например, ``https://evil.com\@youtube.com`` ведет на evil.com)
+    if '@' in parts.netloc:
+        return False
+    return parts.hostname in YOUTUBE_HOSTS
+
+
+def find_invalid_links(materials):
+    """
+    Находит за один проход все строки материалов со ссылками не на YouTube.
+
+    Пустые строки (в том числе завершающий перевод строки) пропускаются.
+
+    Args:
+        materials (str): Материалы урока, по одной ссылке в строке.
+
+    Returns:
+        list[tuple[int, str]]: Номера строк (с единицы) и неподходящие ссылки.
+
+    """
+    invalid = []
+    for number, line in enumerate(materials.splitlines(), start=1):
+        link = line.strip()
+        if link and not is_youtube_link(link):
+            invalid.append((number, link))
+    return invalid
+
+
+def format_invalid_links(invalid):
+    """
+    Формирует сообщения об ошибках для неподходящих ссылок.
+
+    Args:
+        invalid (list[tuple[int, str]]): Результат find_invalid_links().
+
+    Returns:
+        list[str]: Общее сообщение и по одному сообщению на строку.
+
+    """
+    return ['В материалах разрешены только ссылки на YouTube.'] + [
+        f'Строка {number}: {link!r}' for number, link in invalid
+    ]
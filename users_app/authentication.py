@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+
+def user_cache_key(user_id):
+    """Ключ кеша пользователя, найденного по JWT."""
+    return f'jwt-user:{user_id}'
+
+
+def invalidate_cached_users(user_ids):
+    """
+    Удаляет пользователей из кеша аутентификации.
+
+    Args:
+        user_ids (Iterable[int]): Идентификаторы пользователей.
+
+    """
+    keys = [user_cache_key(user_id) for user_id in user_ids]
+    if keys:
+        cache.delete_many(keys)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация с кешированием пользователя на ``JWT_USER_CACHE_TIMEOUT`` секунд.
+
+    Пользователь загружается из базы только при промахе кеша. Запись удаляется при
+    изменении, удалении пользователя и смене его групп (users_app.signals), а также
+    при блокировке неактивных пользователей, поэтому заблокированный аккаунт перестает
+    проходить аутентификацию сразу, а не по истечении TTL.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            # Поиск в базе и проверки simplejwt (пользователь найден и активен)
+            user = super().get_user(validated_token)
+            cache.set(key, user, settings.JWT_USER_CACHE_TIMEOUT)
+        elif not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
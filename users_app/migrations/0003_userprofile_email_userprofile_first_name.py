@@ -0,0 +1,23 @@
+# Generated by Django 4.2.5 on 2026-10-18 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users_app', '0002_remove_userprofile_first_name_alter_userprofile_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='email',
+            field=models.EmailField(blank=True, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='first_name',
+            field=models.CharField(blank=True, max_length=30),
+        ),
+    ]
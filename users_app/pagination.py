@@ -0,0 +1,8 @@
+from courses.pagination import KeysetPagination
+
+
+class UserProfilePagination(KeysetPagination):
+    """Keyset-пагинация профилей пользователей по id."""
+    ordering_field = 'id'
+    default_ordering = 'id'
+    page_size = 100
@@ -0,0 +1,87 @@
+"""
+Кеш групп пользователей для проверки статуса модератора.
+
+Группы пользователя загружаются один раз и хранятся в кеше как снимок, после чего
+проверка статуса модератора сводится к поиску во множестве. Снимок пользователя
+сбрасывается при изменении его групп (users_app.signals), а переименование или
+удаление группы увеличивает общую версию снимков, так как затрагивает всех ее участников.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+MODERATOR_GROUP = 'Модераторы'
+
+_VERSION_KEY = 'user-groups:version'
+
+
+def _get_version():
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        # add() не перезапишет версию, установленную параллельным запросом
+        cache.add(_VERSION_KEY, 1, timeout=None)
+        version = cache.get(_VERSION_KEY, 1)
+    return version
+
+
+def _snapshot_key(user_id, version):
+    return f'user-groups:{version}:{user_id}'
+
+
+def bump_groups_version():
+    """Делает устаревшими снимки групп всех пользователей (группы переименованы или удалены)."""
+    try:
+        cache.incr(_VERSION_KEY)
+    except ValueError:
+        cache.set(_VERSION_KEY, 2, timeout=None)
+
+
+def invalidate_group_snapshots(user_ids):
+    """
+    Удаляет снимки групп пользователей.
+
+    Args:
+        user_ids (Iterable[int]): Идентификаторы пользователей.
+
+    """
+    version = _get_version()
+    keys = [_snapshot_key(user_id, version) for user_id in user_ids]
+    if keys:
+        cache.delete_many(keys)
+
+
+def get_group_names(user):
+    """
+    Возвращает имена групп пользователя: из объекта пользователя, из кеша или из базы.
+
+    Args:
+        user (User): Аутентифицированный пользователь.
+
+    Returns:
+        frozenset[str]: Имена групп.
+
+    """
+    groups = getattr(user, '_group_names', None)
+    if groups is None:
+        key = _snapshot_key(user.pk, _get_version())
+        groups = cache.get(key)
+        if groups is None:
+            groups = frozenset(user.groups.values_list('name', flat=True))
+            cache.set(key, groups, settings.PERMISSION_CACHE_TIMEOUT)
+        user._group_names = groups
+    return groups
+
+
+def is_moderator(user):
+    """
+    Проверяет, является ли пользователь модератором: сотрудником или участником группы «Модераторы».
+
+    Args:
+        user (User): Пользователь.
+
+    Returns:
+        bool: True для модераторов.
+
+    """
+    if not (user and user.is_authenticated):
+        return False
+    return user.is_staff or MODERATOR_GROUP in get_group_names(user)
@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from myproject.fieldsets import SparseFieldsetMixin
 from .models import UserProfile
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = UserProfile
         fields = '__all__'
@@ -0,0 +1,49 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_cached_users
+from .permissions import bump_groups_version, invalidate_group_snapshots
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Сбрасывает кеш аутентификации при изменении или удалении пользователя."""
+    invalidate_cached_users([instance.pk])
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_group_members(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Сбрасывает кеш аутентификации и снимки групп пользователей, у которых изменился состав групп.
+
+    Args:
+        instance (User | Group): Пользователь (user.groups) или группа (group.user_set).
+        action (str): Этап изменения связи.
+        reverse (bool): True, если изменение выполнено со стороны группы.
+        pk_set (set | None): Идентификаторы добавленных или удаленных объектов.
+
+    """
+    if not reverse:
+        user_ids = [instance.pk] if action in ('post_add', 'post_remove', 'post_clear') else []
+    elif action in ('post_add', 'post_remove'):
+        user_ids = pk_set
+    elif action == 'pre_clear':
+        # После очистки участников группы уже не узнать
+        user_ids = list(instance.user_set.values_list('pk', flat=True))
+    else:
+        user_ids = []
+    if user_ids:
+        invalidate_cached_users(user_ids)
+        invalidate_group_snapshots(user_ids)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_groups(sender, **kwargs):
+    """Делает устаревшими все снимки групп при переименовании или удалении групп."""
+    bump_groups_version()
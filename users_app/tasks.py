@@ -1,40 +1,204 @@
-from celery import shared_task
-from django.core.mail import send_mail
+import logging
+import time
+from smtplib import SMTPException, SMTPRecipientsRefused
+
+from celery import chord, shared_task
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, NullIf
 from courses.models import Subscription
+from .authentication import invalidate_cached_users
 from django.utils import timezone
-from users_app.models import UserProfile
+
+logger = logging.getLogger(__name__)
+
+# Количество получателей в одной подзадаче рассылки (одно SMTP-соединение на подзадачу)
+NOTIFICATION_CHUNK_SIZE = 500
+NOTIFICATION_SUBJECT = 'Уведомление о обновлении курса'
+
+
+def iter_subscriber_emails(course_id):
+    """
+    Потоково выбирает уникальные адреса подписчиков курса одним запросом.
+
+    Адрес берется из профиля, а если он пуст — из учетной записи пользователя.
+
+    Args:
+        course_id (int): Курс, подписчикам которого отправляется рассылка.
+
+    Yields:
+        str: Адрес электронной почты.
+
+    """
+    emails = (
+        Subscription.objects.filter(course_id=course_id)
+        .annotate(address=Coalesce(NullIf(F('user__email'), Value('')), F('user__user__email')))
+        .exclude(address__isnull=True)
+        .exclude(address='')
+        .order_by('address')
+        .values_list('address', flat=True)
+        .distinct()
+    )
+    yield from emails.iterator(chunk_size=2000)
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
 
 
 @shared_task
-def send_update_notification_emails(course_title):
+def send_update_notification_emails(course_title, course_id, chunk_size=NOTIFICATION_CHUNK_SIZE):
     """
     Отправляет уведомление об обновлении курса всем подписанным пользователям.
 
+    Адреса выбираются потоково и делятся на подзадачи по ``chunk_size`` получателей,
+    которые выполняются группой (chord); итоговая задача сообщает о результатах.
+
     Args:
         course_title (str): Название обновленного курса.
+        course_id (int): Идентификатор курса.
+        chunk_size (int): Количество получателей в одной подзадаче.
 
     Returns:
-        None
+        dict: Количество подзадач и получателей.
     """
-    # Получаем все активные подписки
-    subscriptions = Subscription.objects.filter(active=True)
+    started_at = time.time()
+    header = []
+    recipients = 0
+    for emails in _chunks(iter_subscriber_emails(course_id), chunk_size):
+        header.append(send_notification_chunk.s(course_title, emails))
+        recipients += len(emails)
 
-    # Отправляем уведомление каждому подписчику
-    for subscription in subscriptions:
-        user_email = subscription.user.email
-        message = f"Привет!\n\nКурс {course_title} был обновлен."
-        send_mail('Уведомление о обновлении курса', message, 'pass', [user_email])
+    logger.info('Рассылка по курсу %r: %s получателей в %s подзадачах', course_title, recipients, len(header))
+    if header:
+        chord(header)(report_notification_results.s(course_title, started_at))
+    return {'chunks': len(header), 'recipients': recipients}
+
+
+@shared_task(bind=True, max_retries=5)
+def send_notification_chunk(self, course_title, emails, sent=0, recipients=None):
+    """
+    Отправляет уведомления группе получателей через одно SMTP-соединение.
+
+    Письма отправляются по одному. Если получателя отклонил сервер (SMTPRecipientsRefused),
+    повторять бессмысленно, и он пропускается. При ошибке соединения подзадача повторяется
+    с экспоненциальной задержкой только для еще не получивших письмо адресов, поэтому
+    повторная попытка не рассылает письма повторно.
+
+    Args:
+        course_title (str): Название обновленного курса.
+        emails (list[str]): Адреса, которым письмо еще не отправлено.
+        sent (int): Количество писем, отправленных предыдущими попытками.
+        recipients (int | None): Исходное количество получателей подзадачи.
+
+    Returns:
+        dict: Количество отправленных писем и получателей.
+    """
+    if recipients is None:
+        recipients = len(emails)
+    body = f"Привет!\n\nКурс {course_title} был обновлен."
+    with get_connection() as connection:
+        for index, email in enumerate(emails):
+            message = EmailMessage(NOTIFICATION_SUBJECT, body, settings.DEFAULT_FROM_EMAIL, [email],
+                                   connection=connection)
+            try:
+                sent += message.send()
+            except SMTPRecipientsRefused:
+                logger.warning('Подзадача рассылки %s: адрес %s отклонен сервером', self.request.id, email)
+            except (SMTPException, OSError) as exc:
+                remaining = emails[index:]
+                logger.warning('Подзадача рассылки %s: ошибка отправки (%s), осталось %s из %s',
+                               self.request.id, exc, len(remaining), recipients)
+                raise self.retry(args=(course_title, remaining), kwargs={'sent': sent, 'recipients': recipients},
+                                 exc=exc, countdown=2 ** self.request.retries)
+    logger.info('Подзадача рассылки %s: отправлено %s из %s (попытка %s)',
+                self.request.id, sent, recipients, self.request.retries + 1)
+    return {'sent': sent, 'recipients': recipients}
+
+
+@shared_task
+def report_notification_results(results, course_title, started_at):
+    """
+    Подводит итоги рассылки: количество отправленных писем и пропускную способность.
+
+    Args:
+        results (list[dict]): Результаты подзадач.
+        course_title (str): Название обновленного курса.
+        started_at (float): Время начала рассылки (unix time).
+
+    Returns:
+        dict: Итоги рассылки.
+    """
+    sent = sum(result['sent'] for result in results)
+    recipients = sum(result['recipients'] for result in results)
+    elapsed = max(time.time() - started_at, 1e-6)
+    summary = {
+        'course': course_title,
+        'sent': sent,
+        'recipients': recipients,
+        'chunks': len(results),
+        'seconds': round(elapsed, 3),
+        'emails_per_second': round(sent / elapsed, 1),
+    }
+    logger.info('Рассылка завершена: %s', summary)
+    return summary
+
+
+# Ширина диапазона первичных ключей, блокируемого одним UPDATE (ограничивает время блокировок)
+LOCK_BATCH_SIZE = 5000
 
 
 @shared_task
-def check_and_lock_inactive_users():
+def check_and_lock_inactive_users(batch_size=LOCK_BATCH_SIZE):
+    """
+    Блокирует учетные записи, не входившие в систему более месяца.
+
+    Обновление выполняется set-based запросами UPDATE по диапазонам первичных ключей
+    модели AUTH_USER_MODEL, каждый в отдельной короткой транзакции; записи
+    в Python не загружаются.
+
+    Args:
+        batch_size (int): Ширина диапазона первичных ключей для одного UPDATE.
+
+    Returns:
+        int: Количество заблокированных учетных записей.
+    """
+    started_at = time.monotonic()
     # Определяем "неактивность" как отсутствие входа более месяца
     one_month_ago = timezone.now() - timezone.timedelta(days=30)
 
-    # Находим пользователей, неактивных более месяца
-    inactive_users = UserProfile.objects.filter(last_login__lte=one_month_ago, is_active=True)
+    User = get_user_model()
+    inactive_users = User.objects.filter(last_login__lte=one_month_ago, is_active=True).order_by('pk')
+
+    locked = 0
+    batches = 0
+    last_pk = None
+    while True:
+        candidates = inactive_users if last_pk is None else inactive_users.filter(pk__gt=last_pk)
+        # Границы очередного диапазона берутся по индексу первичного ключа
+        bounds = list(candidates.values_list('pk', flat=True)[:batch_size])
+        if not bounds:
+            break
+        with transaction.atomic():
+            locked += inactive_users.filter(pk__gte=bounds[0], pk__lte=bounds[-1]).update(is_active=False)
+        # UPDATE не вызывает сигналы, поэтому сбрасываем кеш аутентификации заблокированных явно
+        invalidate_cached_users(bounds)
+        batches += 1
+        last_pk = bounds[-1]
 
-    # Блокируем неактивных пользователей
-    for user in inactive_users:
-        user.is_active = False
-        user.save()
+    logger.info('Блокировка неактивных пользователей: %s', {
+        'locked': locked,
+        'batches': batches,
+        'seconds': round(time.monotonic() - started_at, 3),
+    })
+    return locked
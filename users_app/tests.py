@@ -1,3 +1,196 @@
-from django.test import TestCase
+from smtplib import SMTPRecipientsRefused, SMTPServerDisconnected
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from courses.models import Course, Subscription
+from .models import UserProfile
+from .permissions import MODERATOR_GROUP, is_moderator
+from .tasks import check_and_lock_inactive_users, send_notification_chunk, send_update_notification_emails
+
+
+class FlakyEmailBackend(EmailBackend):
+    """Почтовый бэкенд, который отклоняет адреса refused@… и один раз обрывает соединение на drop@…."""
+    dropped = set()
+
+    def send_messages(self, messages):
+        for message in messages:
+            address = message.to[0]
+            if address.startswith('refused@'):
+                raise SMTPRecipientsRefused({address: (550, b'No such user')})
+            if address.startswith('drop@') and address not in self.dropped:
+                self.dropped.add(address)
+                raise SMTPServerDisconnected('Connection unexpectedly closed')
+        return super().send_messages(messages)
+
+
+class UpdateNotificationTestCase(TestCase):
+    """Тесты рассылки уведомлений об обновлении курса (locmem email backend)."""
+
+    def setUp(self):
+        self.owner = get_user_model().objects.create_user(username='owner', email='owner@example.com')
+        self.course = Course.objects.create(title='Курс', description='Описание', owner=self.owner)
+        self.other_course = Course.objects.create(title='Другой курс', description='Описание', owner=self.owner)
+        for i in range(7):
+            user = get_user_model().objects.create_user(username=f'user{i}', email=f'user{i}@example.com')
+            # У части профилей адрес не заполнен — используется адрес учетной записи
+            profile = UserProfile.objects.create(user=user, email=f'profile{i}@example.com' if i % 2 else '')
+            Subscription.objects.create(user=profile, course=self.course)
+        Subscription.objects.create(user=profile, course=self.other_course)
+
+    def test_sends_one_email_per_subscriber_in_chunks(self):
+        result = send_update_notification_emails.apply(args=('Курс',), kwargs={'course_id': self.course.pk,
+                                                                               'chunk_size': 3}).get()
+
+        self.assertEqual(result, {'chunks': 3, 'recipients': 7})
+        recipients = sorted(message.to[0] for message in mail.outbox)
+        self.assertEqual(len(recipients), 7)
+        self.assertIn('user0@example.com', recipients)
+        self.assertIn('profile1@example.com', recipients)
+
+    @override_settings(EMAIL_BACKEND='users_app.tests.FlakyEmailBackend')
+    def test_retry_sends_only_remaining_and_skips_refused(self):
+        FlakyEmailBackend.dropped.clear()
+        emails = ['a@example.com', 'refused@example.com', 'b@example.com', 'drop@example.com', 'c@example.com']
+        # throw=False: иначе в eager-режиме Retry пробрасывается вместо повторного запуска
+        result = send_notification_chunk.apply(args=('Курс', emails), throw=False).get()
+
+        # Каждый доставленный адрес получил ровно одно письмо, отклоненный не повторялся
+        self.assertEqual(result, {'sent': 4, 'recipients': 5})
+        self.assertEqual([message.to[0] for message in mail.outbox],
+                         ['a@example.com', 'b@example.com', 'drop@example.com', 'c@example.com'])
+
+
+class LockInactiveUsersTestCase(TestCase):
+    """Тесты блокировки неактивных учетных записей."""
+
+    def test_locks_only_users_inactive_for_a_month(self):
+        User = get_user_model()
+        now = timezone.now()
+        stale = [User.objects.create_user(username=f'stale{i}', email=f'stale{i}@example.com',
+                                          last_login=now - timezone.timedelta(days=31 + i)) for i in range(5)]
+        recent = User.objects.create_user(username='recent', email='recent@example.com',
+                                          last_login=now - timezone.timedelta(days=3))
+        never = User.objects.create_user(username='never', email='never@example.com')
+        locked = User.objects.create_user(username='locked', email='locked@example.com', is_active=False,
+                                          last_login=now - timezone.timedelta(days=90))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(check_and_lock_inactive_users(batch_size=2), 5)
+        # Диапазоны по два первичных ключа: по одному UPDATE на диапазон, включая неполный последний
+        updates = [query for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 3)
+        self.assertFalse(User.objects.filter(pk__in=[user.pk for user in stale], is_active=True).exists())
+        self.assertEqual(set(User.objects.filter(is_active=True).values_list('pk', flat=True)),
+                         {recent.pk, never.pk})
+        self.assertFalse(User.objects.get(pk=locked.pk).is_active)
+        self.assertEqual(check_and_lock_inactive_users(batch_size=2), 0)
+
+
+class UserProfileListTestCase(TestCase):
+    """Тесты количества SQL-запросов списков профилей."""
+
+    def setUp(self):
+        owner = get_user_model().objects.create_user(username='owner', email='owner@example.com')
+        courses = [Course.objects.create(title=f'Курс {i}', description='Описание', owner=owner) for i in range(3)]
+        for i in range(30):
+            user = get_user_model().objects.create_user(username=f'user{i}', email=f'user{i}@example.com')
+            UserProfile.objects.create(user=user).courses.set(courses[:i % 4])
+        self.client = APIClient()
+        self.client.force_authenticate(owner)
+
+    def test_profile_lists_use_fixed_number_of_queries(self):
+        for url in ('/users/userprofiles/', '/users/userprofiles-list/'):
+            with self.subTest(url=url), self.assertNumQueries(2):
+                response = self.client.get(url, {'page_size': 25})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), 25)
+            self.assertEqual(sorted(response.data['results'][2]['courses']), [
+                course.pk for course in Course.objects.order_by('pk')[:2]
+            ])
+
+
+class CachedJWTAuthenticationTestCase(TestCase):
+    """Тесты кеширования пользователя при JWT-аутентификации."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username='api', email='api@example.com')
+        UserProfile.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.url = '/users/userprofiles-list/'
+
+    def test_cached_user_skips_lookup(self):
+        with self.assertNumQueries(3):
+            self.client.get(self.url)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_changes_invalidate_cache(self):
+        self.client.get(self.url)
+        self.user.groups.create(name='Редакторы')
+        with self.assertNumQueries(3):
+            self.client.get(self.url)
+
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            last_login=timezone.now() - timezone.timedelta(days=60),
+        )
+        self.assertEqual(check_and_lock_inactive_users(), 1)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+class PermissionSnapshotTestCase(TestCase):
+    """Тесты кеша групп и статуса модератора."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username='moderator', email='moderator@example.com')
+        self.group = Group.objects.create(name=MODERATOR_GROUP)
+
+    def fresh_user(self):
+        return get_user_model().objects.get(pk=self.user.pk)
+
+    def patch_course(self, course):
+        client = APIClient()
+        client.force_authenticate(self.fresh_user())
+        with CaptureQueriesContext(connection) as queries:
+            response = client.patch(f'/courses/{course.pk}/', {'title': 'Проверено'}, format='json')
+        group_queries = [query for query in queries.captured_queries if 'auth_user_groups' in query['sql']]
+        return response.status_code, len(group_queries)
+
+    def test_moderator_status_is_cached_and_invalidated(self):
+        owner = get_user_model().objects.create_user(username='owner', email='owner@example.com')
+        course = Course.objects.create(title='Курс', description='Описание', owner=owner)
+        self.assertEqual(self.patch_course(course), (403, 1))
+
+        self.user.groups.add(self.group)
+        self.assertEqual(self.patch_course(course), (200, 1))
+        # Повторный запрос берет группы из кеша
+        self.assertEqual(self.patch_course(course), (200, 0))
+
+        self.group.user_set.remove(self.user)
+        self.assertEqual(self.patch_course(course), (403, 1))
+
+        self.user.groups.add(self.group)
+        self.assertTrue(is_moderator(self.fresh_user()))
+        self.group.name = 'Бывшие модераторы'
+        self.group.save()
+        self.assertFalse(is_moderator(self.fresh_user()))
+
+    def test_profile_writes_stay_staff_only(self):
+        self.user.user_permissions.add(Permission.objects.get(codename='add_userprofile'))
+        client = APIClient()
+        client.force_authenticate(self.fresh_user())
+        response = client.post('/users/userprofiles-list/', {'user': self.user.pk}, format='json')
+        self.assertEqual(response.status_code, 403)
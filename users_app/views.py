@@ -1,7 +1,11 @@
 from django.shortcuts import render
 from django.views import View
 from rest_framework import generics, viewsets
+from django.db.models import Prefetch
+from courses.models import Course
+from myproject.fieldsets import SparseFieldsetViewMixin
 from .models import UserProfile
+from .pagination import UserProfilePagination
 from .serializers import UserProfileSerializer
 from rest_framework import permissions
 from django.apps import AppConfig
@@ -16,7 +20,7 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
             return True
-        return obj.user == request.user
+        return obj.user_id == request.user.pk
 
 
 class IsStaffOrReadOnly(permissions.BasePermission):
@@ -30,6 +34,18 @@ class IsStaffOrReadOnly(permissions.BasePermission):
         return request.user and request.user.is_staff
 
 
+def profile_queryset():
+    """
+    Профили с пользователем (для __str__) и id курсов, загруженными заранее.
+
+    Страница профилей любого размера читается двумя запросами: профили с JOIN пользователя
+    и один запрос курсов для всей страницы.
+    """
+    return UserProfile.objects.select_related('user').prefetch_related(
+        Prefetch('courses', queryset=Course.objects.only('pk')),
+    )
+
+
 class UserProfileDetailView(View):
     """Представление для отображения деталей профиля пользователя."""
     permission_classes = [IsOwnerOrReadOnly, IsStaffOrReadOnly]
@@ -40,35 +56,38 @@ class UserProfileDetailView(View):
         return render(request, 'users_app/user_profile_detail.html', {'user_profile': user_profile})
 
 
-class UserProfileViewSet(viewsets.ModelViewSet):
+class UserProfileViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """ViewSet для выполнения операций CRUD над профилями пользователей."""
 
-    queryset = UserProfile.objects.all()
+    queryset = profile_queryset()
     serializer_class = UserProfileSerializer
     permission_classes = [IsOwnerOrReadOnly, IsStaffOrReadOnly]
+    pagination_class = UserProfilePagination
 
 
-class UserProfileListCreateView(generics.ListCreateAPIView):
+class UserProfileListCreateView(SparseFieldsetViewMixin, generics.ListCreateAPIView):
     """Представление для отображения списка профилей пользователей и создания новых профилей."""
 
-    queryset = UserProfile.objects.all()
+    queryset = profile_queryset()
     serializer_class = UserProfileSerializer
     permission_classes = [IsOwnerOrReadOnly, IsStaffOrReadOnly]
+    pagination_class = UserProfilePagination
 
 
-class UserProfileDetailView(generics.RetrieveUpdateDestroyAPIView):
+class UserProfileDetailView(SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """Представление для получения, обновления и удаления профиля пользователя."""
 
-    queryset = UserProfile.objects.all()
+    queryset = profile_queryset()
     serializer_class = UserProfileSerializer
 
 
-class UserProfileListView(generics.ListAPIView):
+class UserProfileListView(SparseFieldsetViewMixin, generics.ListAPIView):
     """Представление для отображения списка профилей пользователей."""
 
-    queryset = UserProfile.objects.all()
+    queryset = profile_queryset()
     serializer_class = UserProfileSerializer
     permission_classes = [IsOwnerOrReadOnly, IsStaffOrReadOnly]
+    pagination_class = UserProfilePagination
 
 
 class UsersAppConfig(AppConfig):